@@ -0,0 +1,219 @@
+import hashlib
+import random
+import secrets
+import struct
+import time
+
+# -------------------------
+# 牌表与牌堆
+# -------------------------
+SUITS = ('♠', '♥', '♦', '♣')
+RANKS = ('2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A')
+# 预先生成的不可变牌表，单字节牌编码：code = 花色索引 * 13 + 点数索引
+CARDS = tuple(f"{rank}{suit}" for suit in SUITS for rank in RANKS)
+CARD_CODES = {card: code for code, card in enumerate(CARDS)}
+
+
+_FAST_WORDS = struct.Struct("<16I")
+
+
+class FastShuffler:
+    """
+    快速洗牌：以种子为密钥的 BLAKE2b 计数器输出作为随机数流，一次哈希得到 16 个 32 位随机数，
+    用乘法移位（Lemire 方法）映射到 [0, n)，极少数落在偏差区间的值会被丢弃重取。
+    一局发牌只需一两次哈希，不必每局重新播种随机数生成器。
+    """
+    name = "fast"
+    id = 0
+
+    def new_seed(self) -> int:
+        return random.getrandbits(64)
+
+    def stream(self, seed: int):
+        """返回由种子确定的 below(n) 函数，依次给出 [0, n) 内的随机整数"""
+        key = seed.to_bytes(8, "little")
+        counter = [0]
+        words = []
+
+        def below(n: int) -> int:
+            while True:
+                if not words:
+                    block = hashlib.blake2b(counter[0].to_bytes(8, "little"), key=key).digest()
+                    words.extend(_FAST_WORDS.unpack(block))
+                    counter[0] += 1
+                product = words.pop() * n
+                # 低 32 位不小于 n 时一定无偏；否则再按阈值判断是否需要重取
+                if product & 0xFFFFFFFF >= n or product & 0xFFFFFFFF >= 0x100000000 % n:
+                    return product >> 32
+
+        return below
+
+
+_WORDS = struct.Struct("<8I")
+
+
+class SecureShuffler:
+    """
+    安全洗牌：种子由 secrets 生成，随机数取自以种子为密钥的 SHA-256 计数器模式输出，
+    相同种子总能复现相同牌序，便于事后审计。
+    """
+    name = "secure"
+    id = 1
+
+    def new_seed(self) -> int:
+        return secrets.randbits(64)
+
+    def stream(self, seed: int):
+        key = seed.to_bytes(8, "little")
+        counter = [0]
+        words = []
+
+        def below(n: int) -> int:
+            limit = 0x100000000 - 0x100000000 % n  # 拒绝采样，避免取模偏差
+            while True:
+                if not words:
+                    block = hashlib.sha256(key + counter[0].to_bytes(8, "little")).digest()
+                    words.extend(_WORDS.unpack(block))
+                    counter[0] += 1
+                value = words.pop()
+                if value < limit:
+                    return value % n
+
+        return below
+
+
+class ReplayShuffler:
+    """回放用：不产生随机数，牌序由 Deck.load 按记录装入；沿用记录中的洗牌方式 id，回放出的牌局可以再次编码"""
+    name = "replay"
+
+    def __init__(self, shuffler_id: int = None):
+        self.id = shuffler_id
+
+    def new_seed(self) -> int:
+        return 0
+
+    def stream(self, seed: int):
+        return None
+
+
+SHUFFLERS = {cls.id: cls for cls in (FastShuffler, SecureShuffler)}
+
+
+def get_shuffler(name: str):
+    """按名称（fast / secure）创建洗牌器"""
+    for cls in SHUFFLERS.values():
+        if cls.name == name:
+            return cls()
+    raise ValueError(f"未知的洗牌方式: {name}")
+
+
+class Deck:
+    """
+    每张牌桌复用的牌堆缓冲区，发牌只移动下标，不从列表中弹出。
+    洗牌采用惰性 Fisher-Yates：每发一张牌才抽一次随机数并交换一次，
+    一局只为真正发出的牌付出代价。缓冲区始终是 52 张牌的一个排列，
+    发完即报错而不会重新生成，因此同一局内不可能发出重复的牌。
+    """
+
+    def __init__(self, shuffler=None):
+        self.shuffler = shuffler or FastShuffler()
+        self.codes = list(range(52))    # 牌序缓冲区，按下标顺序发牌
+        self.size = 52                  # 缓冲区中可发的牌数
+        self.position = 0               # 下一张要发的牌的下标
+        self.seed = None                # 本局洗牌种子
+        self._below = None              # 本局随机数流；为 None 时按缓冲区现有顺序发牌
+
+    def shuffle(self, seed: int = None) -> int:
+        """开始新一局并返回种子；不传种子时由洗牌器生成"""
+        if seed is None:
+            seed = self.shuffler.new_seed()
+        # 复位为初始牌序，保证同一种子得到同一牌序；复用原列表，不重新分配
+        self.codes[:] = range(52)
+        self.size = 52
+        self.position = 0
+        self.seed = seed
+        self._below = self.shuffler.stream(seed)
+        return seed
+
+    def load(self, codes: bytes):
+        """按给定顺序装入牌（用于回放），不允许重复或非法的牌"""
+        if len(set(codes)) != len(codes) or any(code >= 52 for code in codes):
+            raise ValueError("牌序中有重复或非法的牌")
+        self.codes[:] = codes
+        self.size = len(codes)
+        self.position = 0
+        self._below = None
+
+    def deal(self) -> int:
+        """发出下一张牌的编码"""
+        i = self.position
+        if i >= self.size:
+            raise RuntimeError("牌堆已发完")
+        codes = self.codes
+        if self._below is not None:
+            j = i + self._below(self.size - i)
+            codes[i], codes[j] = codes[j], codes[i]
+        self.position = i + 1
+        return codes[i]
+
+    def remaining(self) -> int:
+        return self.size - self.position
+
+
+def shuffled_codes(shuffler_id: int, seed: int) -> list:
+    """按记录中的洗牌方式和种子复现整副牌的发牌顺序"""
+    deck = Deck(SHUFFLERS[shuffler_id]())
+    deck.shuffle(seed)
+    return [deck.deal() for _ in range(52)]
+
+
+# -------------------------
+# 吞吐量基准
+# -------------------------
+def _legacy_hand(players: int):
+    suits = ['♠', '♥', '♦', '♣']
+    ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+    deck = [f"{rank}{suit}" for suit in suits for rank in ranks]
+    random.shuffle(deck)
+    for _ in range(players * 2 + 8):
+        deck.pop()
+
+
+def _deck_hand(deck: Deck, players: int):
+    deck.shuffle()
+    for _ in range(players * 2 + 8):
+        CARDS[deck.deal()]
+
+
+def benchmark(hands: int = 20000, players: int = 9) -> list:
+    """模拟发牌：每局洗牌一次，发 players 人手牌、3 张烧牌和 5 张公共牌，返回各方案的吞吐量"""
+    cases = [
+        ("旧实现（每局重建牌表 + pop）", lambda: _legacy_hand(players)),
+        ("Deck + fast", lambda deck=Deck(FastShuffler()): _deck_hand(deck, players)),
+        ("Deck + secure", lambda deck=Deck(SecureShuffler()): _deck_hand(deck, players)),
+    ]
+    results = []
+    for label, run in cases:
+        for _ in range(hands // 10):  # 预热
+            run()
+        started = time.perf_counter()
+        for _ in range(hands):
+            run()
+        elapsed = time.perf_counter() - started
+        results.append((label, hands / elapsed, hands * (players * 2 + 8) / elapsed))
+    return results
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="洗牌与发牌吞吐量基准")
+    parser.add_argument("--hands", type=int, default=20000, help="模拟的局数")
+    parser.add_argument("--players", type=int, default=9, help="每局玩家数")
+    args = parser.parse_args()
+    print(f"模拟 {args.hands} 局，{args.players} 人桌：")
+    for label, hands_per_sec, cards_per_sec in benchmark(args.hands, args.players):
+        print(f"  {label}: {hands_per_sec:,.0f} 局/秒，{cards_per_sec:,.0f} 张/秒")
+
+
+if __name__ == "__main__":
+    main()
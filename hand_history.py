@@ -0,0 +1,369 @@
+import os
+import struct
+
+from .deck import shuffled_codes
+from .poker_game import (
+    PokerGame, MAX_SEATS,
+    ACTION_JOIN, ACTION_BLIND, ACTION_CALL, ACTION_RAISE, ACTION_ALLIN, ACTION_CHECK,
+    ACTION_FOLD, ACTION_DEAL, ACTION_STREET, ACTION_SHOWDOWN, ACTION_WIN,
+)
+
+# -------------------------
+# 紧凑二进制手牌历史
+# -------------------------
+# 单局记录格式（版本 1）：
+#   版本号            1 字节
+#   洗牌方式          1 字节（deck.SHUFFLERS 中的 id）
+#   洗牌种子          8 字节（小端无符号）
+#   时间戳、买入、小盲、大盲、跟注额   varint
+#   群号              varint 长度 + UTF-8
+#   座位数、开局已入座人数            各 1 字节
+#   每个座位          id、昵称（varint 长度 + UTF-8），开局活跃标记 1 字节
+#   已发出的牌        1 字节数量 + 每张牌 1 字节
+#   动作流            varint 数量 + 每个动作 1 字节（高 4 位动作，低 4 位座位），
+#                     涉及筹码的动作后接 zigzag varint 金额
+# 归档文件按段存储，每条记录前缀 varint 长度，只追加写入。
+
+FORMAT_VERSION = 1
+SEGMENT_SIZE = 4 * 1024 * 1024  # 单个归档段的大小上限（字节）
+
+# 需要记录金额的动作
+AMOUNT_ACTIONS = frozenset((ACTION_JOIN, ACTION_BLIND, ACTION_CALL, ACTION_RAISE, ACTION_ALLIN, ACTION_WIN))
+
+_SEED = struct.Struct("<Q")
+
+
+def _write_varint(buf: bytearray, value: int):
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _read_varint(data, pos: int) -> tuple:
+    result = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_str(buf: bytearray, text: str):
+    raw = text.encode("utf-8")
+    _write_varint(buf, len(raw))
+    buf += raw
+
+
+def _read_str(data, pos: int) -> tuple:
+    length, pos = _read_varint(data, pos)
+    end = pos + length
+    return bytes(data[pos:end]).decode("utf-8"), end
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+class HandRecord:
+    """解码后的一局手牌记录"""
+
+    def __init__(self, version: int, shuffler: int, seed: int, timestamp: int, group_id: str, buyin: int, small_blind: int,
+                 big_blind: int, bet_amount: int, seats: list, start_seats: int, dealt: bytes, actions: list):
+        self.version = version            # 记录格式版本
+        self.shuffler = shuffler          # 洗牌方式 id
+        self.seed = seed                  # 洗牌种子
+        self.timestamp = timestamp        # 结束时间
+        self.group_id = group_id          # 群号
+        self.buyin = buyin
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.bet_amount = bet_amount
+        self.seats = seats                # [(id, 昵称, 开局是否活跃), ...]，按座位顺序
+        self.start_seats = start_seats    # 开局时已入座的人数，其余座位通过 JOIN 动作加入
+        self.dealt = dealt                # 已发出的牌（单字节编码，按发牌顺序）
+        self.actions = actions            # [(动作, 座位, 金额), ...]
+
+    def net_chips(self) -> list:
+        """不回放牌局，直接从动作流计算每个座位本局的筹码净变化"""
+        net = [0] * len(self.seats)
+        for action, seat, amount in self.actions:
+            if action == ACTION_WIN:
+                net[seat] += amount
+            elif action in AMOUNT_ACTIONS:
+                net[seat] -= amount
+        return net
+
+
+def encode_hand(game: PokerGame, group_id: str, timestamp: int) -> bytes:
+    """将一局的种子、发牌和动作流编码为紧凑的二进制记录"""
+    buf = bytearray()
+    buf.append(FORMAT_VERSION)
+    buf.append(game.deck.shuffler.id)
+    buf += _SEED.pack(game.seed)
+    for value in (timestamp, game.buyin, game.small_blind, game.big_blind, game.bet_amount):
+        _write_varint(buf, value)
+    _write_str(buf, group_id)
+    if len(game.players) > MAX_SEATS:
+        raise ValueError(f"手牌记录最多支持 {MAX_SEATS} 个座位")
+    start_seats = len(game.start_active)
+    buf.append(len(game.players))
+    buf.append(start_seats)
+    for i, p in enumerate(game.players):
+        _write_str(buf, p["id"])
+        _write_str(buf, p["name"])
+        buf.append(1 if i >= start_seats or game.start_active[i] else 0)
+    buf.append(len(game.dealt))
+    buf += bytes(game.dealt)
+    _write_varint(buf, len(game.actions))
+    for action, seat, amount in game.actions:
+        buf.append((action << 4) | seat)
+        if action in AMOUNT_ACTIONS:
+            _write_varint(buf, _zigzag(amount))
+    return bytes(buf)
+
+
+def decode_hand(data) -> HandRecord:
+    """解码 encode_hand 生成的二进制记录"""
+    version = data[0]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"不支持的手牌记录版本: {version}")
+    shuffler, pos = data[1], 2
+    seed = _SEED.unpack_from(data, pos)[0]
+    pos += _SEED.size
+    timestamp, pos = _read_varint(data, pos)
+    buyin, pos = _read_varint(data, pos)
+    small_blind, pos = _read_varint(data, pos)
+    big_blind, pos = _read_varint(data, pos)
+    bet_amount, pos = _read_varint(data, pos)
+    group_id, pos = _read_str(data, pos)
+    n_seats = data[pos]
+    start_seats = data[pos + 1]
+    pos += 2
+    seats = []
+    for _ in range(n_seats):
+        pid, pos = _read_str(data, pos)
+        name, pos = _read_str(data, pos)
+        seats.append((pid, name, bool(data[pos])))
+        pos += 1
+    n_dealt = data[pos]
+    pos += 1
+    dealt = bytes(data[pos:pos + n_dealt])
+    pos += n_dealt
+    count, pos = _read_varint(data, pos)
+    actions = []
+    for _ in range(count):
+        b = data[pos]
+        pos += 1
+        action = b >> 4
+        amount = 0
+        if action in AMOUNT_ACTIONS:
+            amount, pos = _read_varint(data, pos)
+            amount = _unzigzag(amount)
+        actions.append((action, b & 0x0F, amount))
+    return HandRecord(version, shuffler, seed, timestamp, group_id, buyin, small_blind, big_blind, bet_amount,
+                      seats, start_seats, dealt, actions)
+
+
+def verify_seed(record: HandRecord) -> bool:
+    """用记录中的种子重新洗牌，校验已发出的牌是否与记录一致（用于争议核查）"""
+    codes = shuffled_codes(record.shuffler, record.seed)
+    return bytes(codes[:len(record.dealt)]) == record.dealt
+
+
+def _new_player(seat: tuple) -> dict:
+    return {"id": seat[0], "name": seat[1], "cards": [], "private_unified": "", "round_bet": 0, "active": seat[2]}
+
+
+def replay(record: HandRecord, upto: int = None) -> PokerGame:
+    """
+    按动作流回放一局，返回执行前 upto 个动作后的 PokerGame 状态（默认回放全部动作）。
+    发牌直接使用记录中的牌序，不重新洗牌。
+    """
+    game = PokerGame.for_replay(
+        record.buyin, record.small_blind, record.big_blind, record.bet_amount, len(record.seats),
+        [_new_player(seat) for seat in record.seats[:record.start_seats]], record.shuffler, record.seed, record.dealt)
+
+    players = game.players
+    actions = record.actions if upto is None else record.actions[:upto]
+    for action, seat, amount in actions:
+        game.actions.append((action, seat, amount))
+        if action == ACTION_JOIN:
+            players.append(_new_player(record.seats[seat]))
+            game.pot += amount
+        elif action == ACTION_BLIND:
+            players[seat]["round_bet"] += amount
+            game.pot += amount
+        elif action == ACTION_CALL:
+            players[seat]["round_bet"] += amount
+            game.pot += amount
+            game.advance_turn()
+        elif action == ACTION_RAISE:
+            players[seat]["round_bet"] += amount
+            game.pot += amount
+            game.current_bet = players[seat]["round_bet"]
+            game.advance_turn()
+        elif action == ACTION_ALLIN:
+            player = players[seat]
+            player["round_bet"] += amount
+            game.pot += amount
+            if player["round_bet"] > game.current_bet:
+                game.current_bet = player["round_bet"]
+            game.advance_turn()
+        elif action == ACTION_CHECK:
+            game.advance_turn()
+        elif action == ACTION_FOLD:
+            players[seat]["active"] = False
+            players[seat]["round_bet"] = 0
+        elif action == ACTION_DEAL:
+            game.current_turn_index = 2 if len(players) >= 3 else 0
+            for player in players:
+                player["cards"] = [game.deal_card(), game.deal_card()]
+            game.current_bet = game.big_blind
+            game.phase = "preflop"
+        elif action == ACTION_STREET:
+            game.deal_card()  # 烧牌
+            if game.phase == "preflop":
+                game.community_cards.extend(game.deal_card() for _ in range(3))
+                game.phase = "flop"
+            else:
+                game.community_cards.append(game.deal_card())
+                game.phase = "turn" if game.phase == "flop" else "river"
+            for player in players:
+                if player["active"]:
+                    player["round_bet"] = 0
+            game.current_bet = game.bet_amount
+        elif action == ACTION_SHOWDOWN:
+            game.finished = True
+        elif action == ACTION_WIN:
+            pass  # 派奖只影响余额，不改变牌桌状态
+        else:
+            raise ValueError(f"未知的动作类型: {action}")
+    return game
+
+
+class HandArchive:
+    """按段追加存储的手牌历史归档"""
+
+    def __init__(self, directory: str, segment_size: int = SEGMENT_SIZE):
+        self.directory = directory
+        self.segment_size = segment_size
+        self._index = None      # 当前写入段的序号，首次追加时确定
+        self._size = 0          # 当前写入段的有效长度
+
+    def segments(self) -> list:
+        """按顺序返回所有归档段文件路径"""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith("segment_") and n.endswith(".bin"))
+        return [os.path.join(self.directory, n) for n in names]
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"segment_{index:06d}.bin")
+
+    def _open_current(self):
+        """确定当前写入段；上次崩溃留下的不完整记录会被截掉，否则它的长度前缀会吞掉后续记录"""
+        os.makedirs(self.directory, exist_ok=True)
+        segments = self.segments()
+        index = segment_index(segments[-1]) if segments else 0
+        path = self._segment_path(index)
+        size = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            size = _complete_length(data)
+            if size < len(data):
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+        self._index = index
+        self._size = size
+
+    def append(self, data: bytes) -> tuple:
+        """追加一条记录并返回其结束位置 (段序号, 偏移)；当前段写满后滚动到新段"""
+        if self._index is None:
+            self._open_current()
+        frame = bytearray()
+        _write_varint(frame, len(data))
+        frame += data
+        if self._size and self._size + len(frame) > self.segment_size:
+            self._index += 1
+            self._size = 0
+        try:
+            with open(self._segment_path(self._index), "ab") as f:
+                f.write(frame)
+        except Exception:
+            self._index = None  # 写入失败时可能留下半条记录，下次追加前重新检查段尾
+            raise
+        self._size += len(frame)
+        return self._index, self._size
+
+    def end_position(self):
+        """归档末尾的位置 (段序号, 偏移)，归档为空时为 None"""
+        segments = self.segments()
+        if not segments:
+            return None
+        with open(segments[-1], "rb") as f:
+            return segment_index(segments[-1]), _complete_length(f.read())
+
+    def iter_from(self, position: tuple = None):
+        """依次给出 position 之后的每条原始记录及其结束位置 (段序号, 偏移)；position 为 None 时从头读取"""
+        first, offset = position if position is not None else (-1, 0)
+        for path in self.segments():
+            index = segment_index(path)
+            if index < first:
+                continue
+            for raw, end in iter_frames(path, offset if index == first else 0):
+                yield raw, (index, end)
+
+    def __iter__(self):
+        for path in self.segments():
+            yield from iter_segment(path)
+
+
+def segment_index(path: str) -> int:
+    """由归档段文件名（segment_000123.bin）得到段序号"""
+    return int(os.path.basename(path)[len("segment_"):-len(".bin")])
+
+
+def _frame_bounds(data, pos: int = 0):
+    """依次给出每条完整记录的 (起始, 结束) 位置，遇到末尾不完整的记录即停止"""
+    end = len(data)
+    while pos < end:
+        try:
+            length, start = _read_varint(data, pos)
+        except IndexError:
+            return  # 长度前缀本身没有写完
+        pos = start + length
+        if pos > end:
+            return  # 末尾未写完整的记录
+        yield start, pos
+
+
+def _complete_length(data) -> int:
+    """归档段中完整记录所占的字节数，其后的内容属于未写完的记录"""
+    length = 0
+    for _, length in _frame_bounds(data):
+        pass
+    return length
+
+
+def iter_frames(path: str, offset: int = 0):
+    """从段内偏移 offset 起逐条读取原始记录，同时给出每条记录在段内的结束偏移"""
+    with open(path, "rb") as f:
+        data = f.read()
+    view = memoryview(data)
+    for start, end in _frame_bounds(data, offset):
+        yield view[start:end], end
+
+
+def iter_segment(path: str):
+    """逐条读取一个归档段中的原始记录（bytes），不做解码"""
+    for raw, _ in iter_frames(path):
+        yield raw
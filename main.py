@@ -1,146 +1,20 @@
-import itertools
-from astrbot.api.all import *
-from astrbot.core.platform.sources.gewechat.client import SimpleGewechatClient
-import random
-import json
+import time
+_IMPORT_STARTED = time.perf_counter()  # 启动耗时测量：本模块开始导入的时刻
+import asyncio
 import os
-
-class PokerGame:
-    def __init__(self, buyin: int, small_blind: int, big_blind: int, bet_amount: int, max_players: int):
-        self.buyin = buyin                  # 加入游戏时支付的买入金额
-        self.small_blind = small_blind      # 小盲注金额
-        self.big_blind = big_blind          # 大盲注金额
-        self.bet_amount = bet_amount        # 后续每轮固定跟注金额
-        self.max_players = max_players      # 最大玩家数
-        self.players = []                   # 玩家记录：{"id": str, "name": str, "cards": list, ...}
-        self.deck = self.create_deck()      # 洗好的牌堆
-        self.community_cards = []           # 公共牌
-        self.phase = "waiting"              # 游戏阶段：waiting, preflop, flop, turn, river, showdown
-        self.pot = 0                        # 当前彩池
-        self.current_bet = 0                # 当前轮要求的投注额度
-        self.current_turn_index = 0         # 当前行动玩家索引
-        self.last_raiser_index = -1         # 最后加注的玩家索引
-        self.all_checked = False            # 是否所有玩家都过牌
-
-    def create_deck(self):
-        suits = ['♠', '♥', '♦', '♣']
-        ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        deck = [f"{rank}{suit}" for suit in suits for rank in ranks]
-        random.shuffle(deck)
-        return deck
-
-    def deal_card(self):
-        if not self.deck:
-            self.deck = self.create_deck()
-        return self.deck.pop()
-
-    def advance_turn(self):
-        """轮转到下一个活跃玩家"""
-        n = len(self.players)
-        if n == 0:
-            return
-        # 从当前行动玩家之后开始查找
-        for i in range(1, n+1):
-            index = (self.current_turn_index + i) % n
-            if self.players[index]["active"]:
-                self.current_turn_index = index
-                return
-
-    def reset_round_bets(self):
-        """重置所有玩家的本轮下注"""
-        for player in self.players:
-            player["round_bet"] = 0
-
-    def all_players_checked(self):
-        """检查是否所有玩家都过牌"""
-        for player in self.players:
-            if player["active"] and player["round_bet"] < self.current_bet:
-                return False
-        return True
-
-# -------------------------
-# 牌型评价函数
-# -------------------------
-def evaluate_5cards(cards: list) -> tuple:
-    """
-    对 5 张牌进行评价，返回一个元组表示手牌强度。
-    数值越大表示手牌越好，元组中第一个元素为类别，其它元素为高牌信息。
-    类别定义：
-        8: 同花顺
-        7: 四条
-        6: 葫芦（满堂红）
-        5: 同花
-        4: 顺子
-        3: 三条
-        2: 两对
-        1: 一对
-        0: 高牌
-    """
-    rank_map = {"2":2, "3":3, "4":4, "5":5, "6":6, "7":7, "8":8, "9":9, "10":10, "J":11, "Q":12, "K":13, "A":14}
-    values = []
-    suits = []
-    for card in cards:
-        rank = card[:-1]
-        suit = card[-1]
-        values.append(rank_map[rank])
-        suits.append(suit)
-    values.sort(reverse=True)
-    freq = {}
-    for v in values:
-        freq[v] = freq.get(v, 0) + 1
-    counts = sorted(freq.values(), reverse=True)
-    flush = len(set(suits)) == 1
-    straight = False
-    high_straight = None
-    unique_vals = sorted(set(values))
-    if len(unique_vals) >= 5:
-        for i in range(len(unique_vals)-4):
-            seq = unique_vals[i:i+5]
-            if seq == list(range(seq[0], seq[0]+5)):
-                straight = True
-                high_straight = seq[-1]
-        if set([14,2,3,4,5]).issubset(set(values)):
-            straight = True
-            high_straight = 5
-    if flush and straight:
-        return (8, high_straight, values)
-    elif counts[0] == 4:
-        four_val = max(v for v, c in freq.items() if c == 4)
-        kicker = max(v for v in values if v != four_val)
-        return (7, four_val, kicker)
-    elif counts[0] == 3 and any(c >= 2 for v, c in freq.items() if c >= 2 and v not in [max(v for v, c in freq.items() if c == 3)]):
-        three_val = max(v for v, c in freq.items() if c == 3)
-        pair_val = max(v for v, c in freq.items() if c >= 2 and v != three_val)
-        return (6, three_val, pair_val)
-    elif flush:
-        return (5, values)
-    elif straight:
-        return (4, high_straight, values)
-    elif counts[0] == 3:
-        three_val = max(v for v, c in freq.items() if c == 3)
-        kickers = sorted([v for v in values if v != three_val], reverse=True)
-        return (3, three_val, kickers)
-    elif counts[0] == 2 and len([v for v, c in freq.items() if c == 2]) >= 2:
-        pairs = sorted([v for v, c in freq.items() if c == 2], reverse=True)
-        kicker = max(v for v in values if v not in pairs)
-        return (2, pairs, kicker)
-    elif counts[0] == 2:
-        pair_val = max(v for v, c in freq.items() if c == 2)
-        kickers = sorted([v for v in values if v != pair_val], reverse=True)
-        return (1, pair_val, kickers)
-    else:
-        return (0, values)
-
-def evaluate_hand(cards: list) -> tuple:
-    """
-    给定 7 张牌（2张手牌+5张公共牌），返回最佳 5 张牌的评价元组。
-    """
-    best = None
-    for combo in itertools.combinations(cards, 5):
-        rank = evaluate_5cards(list(combo))
-        if best is None or rank > best:
-            best = rank
-    return best
+from astrbot.api import logger
+from astrbot.api.event import filter, AstrMessageEvent
+from astrbot.api.star import Context, Star, register
+from .poker_game import (
+    PokerGame, evaluate_hand,
+    ACTION_JOIN, ACTION_BLIND, ACTION_CALL, ACTION_RAISE, ACTION_ALLIN, ACTION_CHECK,
+    ACTION_FOLD, ACTION_DEAL, ACTION_STREET, ACTION_SHOWDOWN, ACTION_WIN,
+)
+from .hand_history import HandArchive, encode_hand
+from .player_stats import StatsStore, summarize
+from .deck import get_shuffler
+from .stores import ShardedStore, preload_in_background
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 # -------------------------
 # 德州扑克插件
@@ -148,76 +22,103 @@ def evaluate_hand(cards: list) -> tuple:
 @register("astrbot_plugin_poker_fixed", "Doudou0611", "修复SamsaraMBJC的BUG", "1.5.1", "https://github.com/doudou0611/astrbot_plugin_poker")
 class TexasHoldemPoker(Star):
     def __init__(self, context: Context, config: dict = None):
+        started = time.perf_counter()
         super().__init__(context)
         self.config = config or {}
         self.games = {}  # 存储各群游戏状态
-        self.tokens_file = os.path.join(os.path.dirname(__file__), "tokens.json")
-        self.tokens = self.load_tokens()
+        self.odds_tasks = set()  # 进行中的胜率提示任务
+        # 各存储在首次访问时才读取文件，同时在后台线程提前加载，初始化耗时与数据量无关
+        base = os.path.dirname(__file__)
+        # 余额和排行榜按群分片：只有活跃的群常驻内存，正在游戏的群不会被淘汰
+        shard_options = {
+            "capacity": self.config.get("shard_cache_size", 64),
+            "idle_seconds": self.config.get("shard_idle_seconds", 600),
+            "is_pinned": lambda group_id: group_id in self.games,
+        }
+        self.tokens = ShardedStore(os.path.join(base, "tokens"), "tokens",
+                                   legacy_path=os.path.join(base, "tokens.json"), **shard_options)
         # 新增：保存游戏记录和排行榜统计
-        self.game_records_file = os.path.join(os.path.dirname(__file__), "game_records.json")
-        self.game_records = self.load_game_records()
-        self.ranking_file = os.path.join(os.path.dirname(__file__), "ranking.json")
-        self.ranking = self.load_ranking()
+        self.hand_archive = HandArchive(os.path.join(base, "hand_records"))
+        self.ranking = ShardedStore(os.path.join(base, "ranking"), "排名", legacy_path=os.path.join(base, "ranking.json"),
+                                    legacy_split=self.split_legacy_ranking, **shard_options)
+        # 玩家统计按间隔写入检查点，未写入的对局在重启时从手牌历史归档补齐
+        self.stats_store = StatsStore(os.path.join(base, "player_stats.json"), self.hand_archive,
+                                      self.config.get("stats_flush_seconds", 60))
+        profile = self.config.get("startup_profile", False)
+        stores = [self.tokens, self.ranking, self.stats_store]
+        preload_in_background(stores, self.report_store_loads if profile else None)
+        if profile:
+            logger.info(f"[poker] 启动耗时：模块导入 {_IMPORT_SECONDS * 1000:.1f} ms，插件初始化 {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def report_store_loads(self, stores: list):
+        """启动耗时测量模式：后台加载完成后输出各存储的加载耗时和文件大小"""
+        for store in stores:
+            if isinstance(store, ShardedStore):
+                if store.load_seconds is not None:
+                    logger.info(f"[poker] 旧版 {store.label} 文件拆分为分片耗时 {store.load_seconds * 1000:.1f} ms")
+                continue
+            size = os.path.getsize(store.path) if os.path.exists(store.path) else 0
+            logger.info(f"[poker] 后台加载 {os.path.basename(store.path)}（{size} 字节）耗时 {store.load_seconds * 1000:.1f} ms")
 
-    def load_game_records(self):
-        try:
-            if os.path.exists(self.game_records_file):
-                with open(self.game_records_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            print("加载游戏记录失败:", e)
-        return []
+    async def terminate(self):
+        """插件卸载时写回所有未保存的分片和统计"""
+        self.tokens.flush()
+        self.ranking.flush()
+        self.stats_store.flush(force=True)
 
-    def save_game_records(self):
-        try:
-            with open(self.game_records_file, "w", encoding="utf-8") as f:
-                json.dump(self.game_records, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            print("保存游戏记录失败:", e)
+    @property
+    def stats(self) -> dict:
+        return self.stats_store.data
 
-    def load_ranking(self):
-        try:
-            if os.path.exists(self.ranking_file):
-                with open(self.ranking_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            print("加载排名失败:", e)
-        return {}
+    @property
+    def stats_names(self) -> dict:
+        return self.stats_store.names
 
-    def save_ranking(self):
+    def save_hand_record(self, group_id: str, game: PokerGame):
+        """将本局以紧凑二进制格式追加到手牌历史归档，并增量更新玩家统计"""
         try:
-            with open(self.ranking_file, "w", encoding="utf-8") as f:
-                json.dump(self.ranking, f, ensure_ascii=False, indent=4)
+            data = encode_hand(game, group_id, int(time.time()))
+            position = self.hand_archive.append(data)
         except Exception as e:
-            print("保存排名失败:", e)
-
-    def update_ranking(self, winners: list, game: PokerGame):
+            print("保存游戏记录失败:", e)
+            return
+        self.stats_store.update(data, position)
+
+    def split_legacy_ranking(self, ranking: dict) -> dict:
+        """旧版排行榜不分群：把每位玩家的记录复制到他有余额的各个群；没有任何余额的玩家保留在 _global 分片中"""
+        self.tokens.migrate_legacy()
+        shards = {}
+        placed = set()
+        for group_id in self.tokens.keys():
+            balances = self.tokens.peek(group_id)
+            for pid, entry in ranking.items():
+                if pid in balances:
+                    shards.setdefault(group_id, {})[pid] = dict(entry)
+                    placed.add(pid)
+        rest = {pid: entry for pid, entry in ranking.items() if pid not in placed}
+        if rest:
+            shards["_global"] = rest
+        return shards
+
+    def save_ranking(self, group_id: str):
+        self.ranking.save(group_id)
+
+    def update_ranking(self, group_id: str, winners: list, game: PokerGame):
         # winners 为 [(player_id, player_name), ...]
+        group_ranking = self.ranking[group_id]
         for p in game.players:
             pid = p["id"]
             name = p["name"]
-            if pid not in self.ranking:
-                self.ranking[pid] = {"name": name, "games_played": 0, "wins": 0}
-            self.ranking[pid]["games_played"] += 1
+            if pid not in group_ranking:
+                group_ranking[pid] = {"name": name, "games_played": 0, "wins": 0}
+            group_ranking[pid]["games_played"] += 1
             if any(w[0] == pid for w in winners):
-                self.ranking[pid]["wins"] += 1
-        self.save_ranking()
+                group_ranking[pid]["wins"] += 1
+        self.save_ranking(group_id)
 
-    def load_tokens(self):
-        try:
-            if os.path.exists(self.tokens_file):
-                with open(self.tokens_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            print("加载tokens失败:", e)
-        return {}
-
-    def save_tokens(self):
-        try:
-            with open(self.tokens_file, "w", encoding="utf-8") as f:
-                json.dump(self.tokens, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            print("保存tokens失败:", e)
+    def save_tokens(self, group_id: str):
+        """只写回该群的余额分片"""
+        self.tokens.save(group_id)
 
     def get_group_id(self, event: AstrMessageEvent) -> str:
         group_id = event.message_obj.group_id
@@ -225,7 +126,60 @@ class TexasHoldemPoker(Star):
             group_id = f"private_{event.get_sender_id()}"
         return group_id
 
-    @command_group("poker")
+    def get_platform_adapter(self, event: AstrMessageEvent):
+        platform_name = event.platform_meta.name
+        return next((adapter for adapter in self.context.platform_manager.get_insts()
+                     if adapter.meta().name.lower() == platform_name.lower()), None)
+
+    async def send_private_message(self, event: AstrMessageEvent, adapter, user_id: str, content: str):
+        """私信玩家：QQ 使用 aiocqhttp 接口，其余平台使用 SimpleGewechatClient 的 post_text"""
+        if event.platform_meta.name == "aiocqhttp":
+            await adapter.bot.send_private_msg(user_id=int(user_id), message=content)  # 确保user_id为整数
+        else:
+            await adapter.client.post_text(user_id, content)
+
+    def schedule_odds_hints(self, event: AstrMessageEvent, game: PokerGame):
+        """发完翻牌、转牌、河牌后在后台估算并私信胜率提示，不阻塞发牌消息"""
+        if not self.config.get("odds_hints", False) or game.phase not in ("flop", "turn", "river"):
+            return
+        adapter = self.get_platform_adapter(event)
+        if adapter is None:
+            return
+        from .odds import StreetOdds, card_codes  # 仅在开启胜率提示时才导入
+        # 在发牌时刻快照手牌和公共牌，后台计算期间牌局继续进行也不受影响
+        holes = {p["id"]: card_codes(p["cards"]) for p in game.players if p["active"] and len(p["cards"]) == 2}
+        street = {"flop": "翻牌", "turn": "转牌", "river": "河牌"}[game.phase]
+        # 翻牌时抽取模拟样本，转牌和河牌沿用同一批样本，按新发的公共牌逐张改写
+        if game.odds is None:
+            game.odds = StreetOdds(self.config.get("odds_samples", 1000))
+        task = asyncio.create_task(self.send_odds_hints(event, adapter, street, game.odds, holes,
+                                                        card_codes(game.community_cards), game.odds_task))
+        game.odds_task = task
+        # 事件循环只弱引用任务，需自行持有直到完成
+        self.odds_tasks.add(task)
+        task.add_done_callback(self.odds_tasks.discard)
+
+    async def send_odds_hints(self, event: AstrMessageEvent, adapter, street: str, odds, holes: dict, board: list,
+                              previous: asyncio.Task = None):
+        from .odds import format_hint
+        if previous is not None:
+            # 同一局的样本由各条街依次改写，需等上一条街算完
+            await asyncio.wait((previous,))
+        budget = self.config.get("odds_budget_ms", 1000) / 1000
+        try:
+            hints = await asyncio.get_running_loop().run_in_executor(None, odds.hints, holes, board, budget)
+        except Exception as e:
+            logger.warning(f"胜率提示计算失败: {e}")
+            return
+        if len(hints) < len(holes):
+            logger.warning(f"{street}胜率提示超出时间预算，{len(holes) - len(hints)} 名玩家未收到提示")
+        for player_id, (equity, outs) in hints.items():
+            try:
+                await self.send_private_message(event, adapter, player_id, format_hint(street, equity, outs))
+            except Exception as e:
+                logger.error(f"胜率提示私信发送失败: {e}")
+
+    @filter.command_group("poker")
     def poker():
         '''德州扑克指令组'''
         pass
@@ -241,7 +195,9 @@ class TexasHoldemPoker(Star):
         big_blind = self.config.get("big_blind", 20)
         bet_amount = self.config.get("bet_amount", 20)
         max_players = self.config.get("max_players", 9)
-        self.games[group_id] = PokerGame(buyin, small_blind, big_blind, bet_amount, max_players)
+        shuffler = get_shuffler(self.config.get("shuffler", "fast"))
+        self.games[group_id] = PokerGame(buyin, small_blind, big_blind, bet_amount, max_players, shuffler)
+        max_players = self.games[group_id].max_players
         yield event.plain_result(
             f"新德州扑克游戏开始！买入: {buyin}, 小盲注: {small_blind}, 大盲注: {big_blind}, 每轮跟注金额: {bet_amount}, 最大玩家: {max_players}。\n请发送 `/poker join` 加入游戏。"
         )
@@ -251,10 +207,8 @@ class TexasHoldemPoker(Star):
         '''增加余额：给当前用户增加指定数量的代币'''
         group_id = self.get_group_id(event)
         sender_id = event.get_sender_id()
-        if group_id not in self.tokens:
-            self.tokens[group_id] = {}
         self.tokens[group_id][sender_id] = self.tokens[group_id].get(sender_id, self.config.get("initial_token", 1000)) + amount
-        self.save_tokens()
+        self.save_tokens(group_id)
         yield event.plain_result(f"成功增加 {amount} 代币。你当前余额: {self.tokens[group_id][sender_id]}")
 
     @poker.command("join")
@@ -270,10 +224,11 @@ class TexasHoldemPoker(Star):
             if player["id"] == sender_id:
                 yield event.plain_result("你已经加入了本局游戏。")
                 return
+        if len(game.players) >= game.max_players:
+            yield event.plain_result(f"本局人数已满，最多 {game.max_players} 名玩家。")
+            return
         # 记录私信 session 字符串供记录使用（格式："gewechat:FriendMessage:{wxid}"）
         private_unified = f"gewechat:FriendMessage:{sender_id}"
-        if group_id not in self.tokens:
-            self.tokens[group_id] = {}
         if sender_id not in self.tokens[group_id]:
             initial_token = self.config.get("initial_token", 1000)
             self.tokens[group_id][sender_id] = initial_token
@@ -282,7 +237,7 @@ class TexasHoldemPoker(Star):
             yield event.plain_result(f"余额不足，买入需要 {buyin} 代币。你当前余额: {self.tokens[group_id][sender_id]}")
             return
         self.tokens[group_id][sender_id] -= buyin
-        self.save_tokens()
+        self.save_tokens(group_id)
         game.pot += buyin
         game.players.append({
             "id": sender_id,
@@ -292,6 +247,7 @@ class TexasHoldemPoker(Star):
             "round_bet": 0,
             "active": True
         })
+        game.record(ACTION_JOIN, game.players[-1], buyin)
         yield event.plain_result(
             f"{sender_name} 加入游戏，扣除买入 {buyin} 代币。当前彩池: {game.pot} 代币。你当前余额: {self.tokens[group_id][sender_id]}"
         )
@@ -311,6 +267,7 @@ class TexasHoldemPoker(Star):
                 p["active"] = False
                 # 重置该玩家的下注金额，避免被误判为已跟注
                 p["round_bet"] = 0
+                game.record(ACTION_FOLD, p)
                 found = True
                 yield event.plain_result(f"{p['name']} 已弃牌。")
                 break
@@ -323,7 +280,9 @@ class TexasHoldemPoker(Star):
             winner = active_players[0]
             group_tokens = self.tokens[group_id]
             group_tokens[winner["id"]] += game.pot
-            self.save_tokens()
+            self.save_tokens(group_id)
+            game.record(ACTION_WIN, winner, game.pot)
+            self.save_hand_record(group_id, game)
             yield event.plain_result(f"只有 {winner['name']} 一人未弃牌，赢得彩池 {game.pot} 代币！")
             del self.games[group_id]
 
@@ -346,29 +305,22 @@ class TexasHoldemPoker(Star):
         else:
             game.current_turn_index = 0
 
-        platform_name = event.platform_meta.name
-        adapter = next((adapter for adapter in self.context.platform_manager.get_insts()
-                        if adapter.meta().name.lower() == platform_name.lower()), None)
+        adapter = self.get_platform_adapter(event)
         if adapter is None:
-            yield event.plain_result(f"未找到 {platform_name} 平台适配器。")
+            yield event.plain_result(f"未找到 {event.platform_meta.name} 平台适配器。")
             return
 
+        game.record(ACTION_DEAL)
         for player in game.players:
             card1 = game.deal_card()
             card2 = game.deal_card()
             player["cards"] = [card1, card2]
             content = f"你的手牌: {card1} {card2}"
-            
-            if event.platform_meta.name == "aiocqhttp":
-                # 修改此处：使用QQ适配器发送私信
-                try:
-                    user_id = int(player["id"])  # 确保user_id为整数
-                    await adapter.bot.send_private_msg(user_id=user_id, message=content)
-                except Exception as e:
-                    logger.error(f"私信发送失败（用户可能未添加好友）: {e}")
-                    yield event.plain_result(f"无法私信玩家 {player['name']}，请确保已添加机器人好友。")
-            else:
-                await adapter.client.post_text(player["id"], content)
+            try:
+                await self.send_private_message(event, adapter, player["id"], content)
+            except Exception as e:
+                logger.error(f"私信发送失败（用户可能未添加好友）: {e}")
+                yield event.plain_result(f"无法私信玩家 {player['name']}，请确保已添加机器人好友。")
         # 分配盲注
         small_blind_player = game.players[0]
         sb_amount = game.small_blind
@@ -378,6 +330,7 @@ class TexasHoldemPoker(Star):
         group_tokens[small_blind_player["id"]] = available - sb
         small_blind_player["round_bet"] += sb
         game.pot += sb
+        game.record(ACTION_BLIND, small_blind_player, sb)
 
         big_blind_player = game.players[1]
         available = group_tokens.get(big_blind_player["id"], 0)
@@ -386,8 +339,9 @@ class TexasHoldemPoker(Star):
         group_tokens[big_blind_player["id"]] = available - bb
         big_blind_player["round_bet"] += bb
         game.pot += bb
+        game.record(ACTION_BLIND, big_blind_player, bb)
 
-        self.save_tokens()
+        self.save_tokens(group_id)
         game.current_bet = game.big_blind
         game.phase = "preflop"
         yield event.plain_result(
@@ -425,7 +379,8 @@ class TexasHoldemPoker(Star):
         group_tokens[sender_id] -= required
         player["round_bet"] += required
         game.pot += required
-        self.save_tokens()
+        game.record(ACTION_CALL, player, required)
+        self.save_tokens(group_id)
         # 完成操作后轮转到下一位活跃玩家
         game.advance_turn()
         yield event.plain_result(f"你已跟注，支付 {required} 代币。当前彩池: {game.pot} 代币。")
@@ -467,7 +422,8 @@ class TexasHoldemPoker(Star):
         game.pot += total_raise
         # 更新当前预注金额为该玩家的总下注
         game.current_bet = player["round_bet"]
-        self.save_tokens()
+        game.record(ACTION_RAISE, player, total_raise)
+        self.save_tokens(group_id)
         game.advance_turn()
         yield event.plain_result(f"你加注了 {increment} 代币，总支付 {total_raise} 代币。当前彩池: {game.pot} 代币，新预注金额: {game.current_bet} 代币。")
 
@@ -483,6 +439,7 @@ class TexasHoldemPoker(Star):
         for p in game.players:
             if p["id"] == sender_id and p["active"]:
                 p["active"] = False
+                game.record(ACTION_FOLD, p)
                 found = True
                 yield event.plain_result(f"{p['name']} 已弃牌。")
                 break
@@ -494,7 +451,9 @@ class TexasHoldemPoker(Star):
             winner = active_players[0]
             group_tokens = self.tokens[group_id]
             group_tokens[winner["id"]] += game.pot
-            self.save_tokens()
+            self.save_tokens(group_id)
+            game.record(ACTION_WIN, winner, game.pot)
+            self.save_hand_record(group_id, game)
             yield event.plain_result(f"只有 {winner['name']} 一人未弃牌，赢得彩池 {game.pot} 代币！")
             del self.games[group_id]
 
@@ -511,6 +470,7 @@ class TexasHoldemPoker(Star):
             return
 
         if game.phase == "preflop":
+            game.record(ACTION_STREET)
             game.deal_card()  # 烧牌
             flop_cards = [game.deal_card() for _ in range(3)]
             game.community_cards.extend(flop_cards)
@@ -519,10 +479,12 @@ class TexasHoldemPoker(Star):
                 if p["active"]:
                     p["round_bet"] = 0
             game.current_bet = game.bet_amount
+            self.schedule_odds_hints(event, game)
             yield event.plain_result(
                 f"翻牌: {' '.join(flop_cards)}。\n当前轮下注金额为 {game.current_bet} 代币。请使用 `/poker call` 跟注，或 `/poker next` 进入下一阶段。"
             )
         elif game.phase == "flop":
+            game.record(ACTION_STREET)
             game.deal_card()  # 烧牌
             turn_card = game.deal_card()
             game.community_cards.append(turn_card)
@@ -531,10 +493,12 @@ class TexasHoldemPoker(Star):
                 if p["active"]:
                     p["round_bet"] = 0
             game.current_bet = game.bet_amount
+            self.schedule_odds_hints(event, game)
             yield event.plain_result(
                 f"转牌: {turn_card}。\n当前轮下注金额为 {game.current_bet} 代币。请使用 `/poker call` 跟注，或 `/poker next` 进入下一阶段。"
             )
         elif game.phase == "turn":
+            game.record(ACTION_STREET)
             game.deal_card()  # 烧牌
             river_card = game.deal_card()
             game.community_cards.append(river_card)
@@ -543,6 +507,7 @@ class TexasHoldemPoker(Star):
                 if p["active"]:
                     p["round_bet"] = 0
             game.current_bet = game.bet_amount
+            self.schedule_odds_hints(event, game)
             yield event.plain_result(
                 f"河牌: {river_card}。\n当前轮下注金额为 {game.current_bet} 代币。请使用 `/poker call` 跟注，或 `/poker next` 进入摊牌阶段。"
             )
@@ -555,7 +520,6 @@ class TexasHoldemPoker(Star):
     @poker.command("showdown")
     async def showdown(self, event: AstrMessageEvent):
         '''摊牌：计算最佳手牌，决定赢家，保存详细记录，并输出最终余额'''
-        import time  # 确保导入 time 模块
         group_id = self.get_group_id(event)
         if group_id not in self.games:
             yield event.plain_result("当前群聊没有正在进行的游戏。")
@@ -586,43 +550,27 @@ class TexasHoldemPoker(Star):
         msg = "摊牌结果：\n"
         for pid, info in results.items():
             msg += f"{info['name']}: {info['hand_rank']} (手牌: {' '.join(info['cards'])})\n"
+        game.record(ACTION_SHOWDOWN)
+        seats = {p["id"]: p for p in game.players}
         if len(winners) == 1:
             winner_name = winners[0][1]
             msg += f"\n赢家是 {winner_name}，赢得彩池 {game.pot} 代币！"
             self.tokens[group_id][winners[0][0]] += game.pot
+            game.record(ACTION_WIN, seats[winners[0][0]], game.pot)
         else:
             names = ", ".join(name for pid, name in winners)
             msg += f"\n平局：{names}，各得彩池的一半。"
             share = game.pot // len(winners)
             for pid, name in winners:
                 self.tokens[group_id][pid] += share
-        self.save_tokens()
-
-        # 保存详细游戏记录
-        game_record = {
-            "group_id": group_id,
-            "phase": game.phase,
-            "pot": game.pot,
-            "community_cards": game.community_cards,
-            "players": [
-                {
-                    "id": p["id"],
-                    "name": p["name"],
-                    "final_bet": p["round_bet"],
-                    "hand": p["cards"],
-                    "active": p["active"],
-                    "hand_rank": results.get(p["id"], {}).get("hand_rank")
-                }
-                for p in game.players
-            ],
-            "winners": winners,
-            "timestamp": int(time.time())
-        }
-        self.game_records.append(game_record)
-        self.save_game_records()
+                game.record(ACTION_WIN, seats[pid], share)
+        self.save_tokens(group_id)
+
+        # 保存本局手牌历史（种子、发牌与完整动作流）
+        self.save_hand_record(group_id, game)
 
         # 更新排行榜数据
-        self.update_ranking(winners, game)
+        self.update_ranking(group_id, winners, game)
 
         # 输出参与玩家最终余额信息
         final_balances = "参与玩家最终余额：\n"
@@ -651,12 +599,30 @@ class TexasHoldemPoker(Star):
     @poker.command("tokens")
     async def my_tokens(self, event: AstrMessageEvent):
         group_id = self.get_group_id(event)
-        if group_id not in self.tokens:
-            balance = self.config.get("initial_token", 1000)
-        else:
-            balance = self.tokens[group_id].get(event.get_sender_id(), self.config.get("initial_token", 1000))
+        balance = self.tokens[group_id].get(event.get_sender_id(), self.config.get("initial_token", 1000))
         yield event.plain_result(f"你的代币余额: {balance} 代币")
 
+    @poker.command("stats")
+    async def show_stats(self, event: AstrMessageEvent, player: str = ""):
+        '''统计：查询自己或指定玩家（昵称或 id）的历史数据'''
+        pid = event.get_sender_id()
+        if player:
+            pid = self.stats_names.get(player, player)
+        stats = self.stats.get(pid)
+        if stats is None:
+            yield event.plain_result("暂无该玩家的统计数据。")
+            return
+        rates = summarize(stats)
+        yield event.plain_result(
+            f"{stats['name']} 的统计：\n"
+            f"发牌局数: {stats['hands_dealt']}\n"
+            f"入池率 VPIP: {rates['vpip']:.1%}\n"
+            f"翻牌前加注率 PFR: {rates['pfr']:.1%}\n"
+            f"摊牌胜率: {rates['showdown_win_rate']:.1%}（{stats['showdowns_won']}/{stats['showdowns']}）\n"
+            f"累计输赢: {stats['net_chips']:+} 代币\n"
+            f"最大赢得彩池: {stats['biggest_pot']} 代币"
+        )
+
     @poker.command("reset")
     async def reset_game(self, event: AstrMessageEvent):
         group_id = self.get_group_id(event)
@@ -698,7 +664,8 @@ class TexasHoldemPoker(Star):
         game.pot += allin_amount
         if player["round_bet"] > game.current_bet:
             game.current_bet = player["round_bet"]
-        self.save_tokens()
+        game.record(ACTION_ALLIN, player, allin_amount)
+        self.save_tokens(group_id)
         game.advance_turn()
         yield event.plain_result(f"你全压了 {allin_amount} 代币。当前彩池: {game.pot} 代币。")
 
@@ -727,6 +694,7 @@ class TexasHoldemPoker(Star):
             yield event.plain_result("你当前还未跟满注，无法看牌。")
             return
         # 看牌操作后，轮转到下一位
+        game.record(ACTION_CHECK, player)
         game.advance_turn()
         yield event.plain_result("你选择看牌，等待下一轮行动。")
 
@@ -742,7 +710,6 @@ class TexasHoldemPoker(Star):
             yield event.plain_result("当前局还未结束，请先摊牌后再决定是否继续。")
             return
         # 重置牌局状态但保留玩家列表和余额
-        game.deck = game.create_deck()
         game.community_cards = []
         game.phase = "waiting"
         game.pot = 0
@@ -751,6 +718,8 @@ class TexasHoldemPoker(Star):
             p["round_bet"] = 0
         # 更新盲注位置：顺时针移动一位（例如，将玩家列表左移1位）
         game.players = game.players[1:] + game.players[:1]
+        # 重新洗牌并开始记录新一局
+        game.begin_hand()
         # 扣除新盲注
         group_tokens = self.tokens[group_id]
         small_blind_player = game.players[0]
@@ -763,14 +732,17 @@ class TexasHoldemPoker(Star):
         group_tokens[small_blind_player["id"]] -= sb
         small_blind_player["round_bet"] = sb
         game.pot += sb
+        game.record(ACTION_BLIND, small_blind_player, sb)
         if big_blind_player:
             if group_tokens.get(big_blind_player["id"], 0) < bb:
+                self.save_tokens(group_id)  # 小盲已扣除
                 yield event.plain_result(f"新大盲 {big_blind_player['name']} 余额不足。")
                 return
             group_tokens[big_blind_player["id"]] -= bb
             big_blind_player["round_bet"] = bb
             game.pot += bb
-        self.save_tokens()
+            game.record(ACTION_BLIND, big_blind_player, bb)
+        self.save_tokens(group_id)
         # 设置当前行动玩家：通常从大盲之后开始（若人数>=3，则索引为2，否则为0）
         if len(game.players) >= 3:
             game.current_turn_index = 2
@@ -0,0 +1,218 @@
+import random
+import time
+
+from .deck import CARDS, CARD_CODES
+
+# -------------------------
+# 胜率与听牌张数（outs）计算
+# -------------------------
+# 牌使用 deck 中的单字节编码（code = 花色 * 13 + 点数，点数 0..12 对应 2..A）。
+# 牌力为可直接比较大小的整数：牌型类别占高位，其后每 4 位一个比较点数。
+
+
+def _straight_high(mask: int) -> int:
+    for high in range(12, 3, -1):
+        run = 0x1F << (high - 4)
+        if mask & run == run:
+            return high
+    if mask & 0x100F == 0x100F:  # A-2-3-4-5
+        return 3
+    return -1
+
+
+# 13 位点数掩码 -> 顺子最高点数（-1 表示没有顺子）
+STRAIGHT_HIGH = tuple(_straight_high(mask) for mask in range(1 << 13))
+
+
+def _top_ranks(mask: int, n: int) -> list:
+    ranks = []
+    r = 12
+    while len(ranks) < n and r >= 0:
+        if mask & (1 << r):
+            ranks.append(r)
+        r -= 1
+    return ranks
+
+
+def _pack(category: int, ranks: list) -> int:
+    value = category
+    for i in range(5):
+        value = (value << 4) | (ranks[i] if i < len(ranks) else 0)
+    return value
+
+
+def rank_cards(cards: list) -> int:
+    """计算 5~7 张牌中最佳 5 张的牌力，数值越大越强；不足 5 张时按已有的牌比较"""
+    counts = [0] * 13
+    suit_masks = [0, 0, 0, 0]
+    mask = 0
+    for code in cards:
+        r = code % 13
+        counts[r] += 1
+        suit_masks[code // 13] |= 1 << r
+        mask |= 1 << r
+
+    flush_mask = 0
+    for suit_mask in suit_masks:
+        if bin(suit_mask).count("1") >= 5:
+            flush_mask = suit_mask
+            break
+    if flush_mask:
+        high = STRAIGHT_HIGH[flush_mask]
+        if high >= 0:
+            return _pack(8, [high])
+
+    quads = []
+    trips = []
+    pairs = []
+    for r in range(12, -1, -1):
+        c = counts[r]
+        if c == 4:
+            quads.append(r)
+        elif c == 3:
+            trips.append(r)
+        elif c == 2:
+            pairs.append(r)
+
+    if quads:
+        return _pack(7, [quads[0]] + _top_ranks(mask & ~(1 << quads[0]), 1))
+    if trips and (len(trips) > 1 or pairs):
+        pair = max(trips[1] if len(trips) > 1 else -1, pairs[0] if pairs else -1)
+        return _pack(6, [trips[0], pair])
+    if flush_mask:
+        return _pack(5, _top_ranks(flush_mask, 5))
+    high = STRAIGHT_HIGH[mask]
+    if high >= 0:
+        return _pack(4, [high])
+    if trips:
+        return _pack(3, [trips[0]] + _top_ranks(mask & ~(1 << trips[0]), 2))
+    if len(pairs) >= 2:
+        kicker_mask = mask & ~(1 << pairs[0]) & ~(1 << pairs[1])
+        return _pack(2, pairs[:2] + _top_ranks(kicker_mask, 1))
+    if pairs:
+        return _pack(1, [pairs[0]] + _top_ranks(mask & ~(1 << pairs[0]), 3))
+    return _pack(0, _top_ranks(mask, 5))
+
+
+def hand_category(rank: int) -> int:
+    """由 rank_cards 的牌力取出牌型类别（0 高牌 ~ 8 同花顺）"""
+    return rank >> 20
+
+
+def improving_cards(hole: list, board: list) -> list:
+    """
+    下一张牌中的 outs：能让自己的牌型升级的牌。只由公共牌本身构成的升级（所有人共享）不算，
+    也不看对手的手牌。
+    """
+    known = set(hole + board)
+    current = hand_category(rank_cards(hole + board))
+    outs = []
+    for card in range(52):
+        if card in known:
+            continue
+        next_board = board + [card]
+        improved = hand_category(rank_cards(hole + next_board))
+        if improved > current and improved > hand_category(rank_cards(next_board)):
+            outs.append(card)
+    return outs
+
+
+class SampleSet:
+    """
+    一位玩家的模拟样本：每个样本为 [待发公共牌..., 对手手牌...]，只从该玩家未见过的牌中抽取，
+    对手的手牌按未知处理。翻牌时抽取一次，之后每发一张公共牌都由 advance 改写沿用，不重新抽样。
+    """
+
+    def __init__(self, hole: list, board: list, opponents: int, samples: int, rng: random.Random):
+        self.hole = hole
+        self.board = list(board)
+        self.opponents = opponents
+        known = set(hole + board)
+        unseen = [code for code in range(52) if code not in known]
+        draw = 5 - len(board) + 2 * opponents
+        self.samples = [rng.sample(unseen, draw) for _ in range(samples)]
+
+    def advance(self, card: int, opponents: int):
+        """
+        发出公共牌 card：样本的第一张待发牌不是 card 时，与样本其余位置上的 card 对调（样本中没有 card 则直接替换），
+        再去掉这张牌。改写后每个结果恰好对应同样多的原样本，因此仍是以 card 为条件的均匀样本，无需丢弃。
+        有人弃牌后只保留剩余对手的手牌。
+        """
+        keep = 5 - len(self.board) + 2 * opponents
+        for cards in self.samples:
+            del cards[keep:]
+            first = cards[0]
+            if first != card and card in cards:
+                cards[cards.index(card)] = first
+            del cards[0]
+        self.board.append(card)
+        self.opponents = opponents
+
+    def equity(self, deadline: float = None) -> float:
+        """按当前样本估算胜率，平分彩池按份额计入"""
+        hole = self.hole
+        board = self.board
+        need = 5 - len(board)
+        draw = need + 2 * self.opponents
+        wins = 0.0
+        for i, cards in enumerate(self.samples):
+            if deadline is not None and i % 64 == 0 and time.perf_counter() > deadline:
+                raise TimeoutError("胜率估算超出时间预算")
+            full_board = board + cards[:need]
+            mine = rank_cards(hole + full_board)
+            tied = 1
+            for j in range(need, draw, 2):
+                theirs = rank_cards(cards[j:j + 2] + full_board)
+                if theirs > mine:
+                    break
+                if theirs == mine:
+                    tied += 1
+            else:
+                wins += 1 / tied
+        return wins / len(self.samples)
+
+
+class StreetOdds:
+    """一局的胜率提示状态：翻牌时为每位玩家抽取样本，转牌和河牌由新发的公共牌逐张改写沿用"""
+
+    def __init__(self, samples: int, rng: random.Random = None):
+        self.samples = samples          # 每位玩家的模拟次数
+        self.rng = rng or random.Random()
+        self.players = {}               # key -> SampleSet
+
+    def hints(self, holes: dict, board: list, budget: float = None) -> dict:
+        """
+        为仍持牌的玩家计算提示，返回 {key: (胜率, [outs 牌编码])}；河牌之后没有待发的牌，只给胜率。
+        时间预算按玩家平分，先算完的玩家剩下的时间顺延给后面的玩家；超时的玩家不在结果中，其余玩家照常返回。
+        """
+        started = time.perf_counter()
+        opponents = len(holes) - 1
+        for key in list(self.players):
+            if key not in holes:
+                del self.players[key]
+        result = {}
+        for i, (key, hole) in enumerate(holes.items()):
+            sample_set = self.players.get(key)
+            if sample_set is None:
+                sample_set = self.players[key] = SampleSet(hole, board, opponents, self.samples, self.rng)
+            else:
+                for card in board[len(sample_set.board):]:
+                    sample_set.advance(card, opponents)
+            deadline = None if budget is None else started + budget * (i + 1) / len(holes)
+            try:
+                equity = sample_set.equity(deadline)
+            except TimeoutError:
+                continue
+            result[key] = (equity, improving_cards(hole, board) if len(board) < 5 else [])
+        return result
+
+
+def format_hint(street: str, equity: float, outs: list) -> str:
+    msg = f"【{street}胜率提示】按对手手牌未知估算，你当前的胜率约为 {equity:.1%}"
+    if outs:
+        msg += f"，能让你牌型升级的 outs {len(outs)} 张: {' '.join(CARDS[code] for code in sorted(outs))}"
+    return msg
+
+
+def card_codes(cards: list) -> list:
+    return [CARD_CODES[card] for card in cards]
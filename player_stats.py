@@ -0,0 +1,250 @@
+import json
+import os
+import time
+
+from .poker_game import (
+    ACTION_JOIN, ACTION_BLIND, ACTION_CALL, ACTION_RAISE, ACTION_ALLIN, ACTION_FOLD,
+    ACTION_DEAL, ACTION_STREET, ACTION_SHOWDOWN, ACTION_WIN,
+)
+from .hand_history import HandArchive, HandRecord, decode_hand, iter_frames, segment_index
+from .stores import JsonStore
+
+# -------------------------
+# 玩家统计
+# -------------------------
+# 每位玩家只保存可累加的计数，比率在查询时由计数直接算出，因此更新和查询都是 O(1)。
+COUNTERS = (
+    "hands_dealt",      # 拿到手牌的局数
+    "vpip_hands",       # 翻牌前主动入池（跟注/加注/全压，不含盲注）的局数
+    "pfr_hands",        # 翻牌前加注的局数
+    "showdowns",        # 进入摊牌的局数
+    "showdowns_won",    # 摊牌获胜的局数
+    "net_chips",        # 累计筹码净变化（含买入）
+)
+
+
+def new_stats(name: str) -> dict:
+    stats = {"name": name, "biggest_pot": 0}
+    for key in COUNTERS:
+        stats[key] = 0
+    return stats
+
+
+def hand_stats(record: HandRecord) -> dict:
+    """计算单局对各玩家统计的增量，返回 {player_id: stats}"""
+    seats = record.seats
+    deltas = [new_stats(seat[1]) for seat in seats]
+    active = [seat[2] for seat in seats]
+    round_bet = [0] * len(seats)
+    seated = record.start_seats
+    current_bet = 0
+    preflop = False
+    showdown = False
+    for action, seat, amount in record.actions:
+        delta = deltas[seat]
+        if action == ACTION_JOIN:
+            seated += 1
+        elif action == ACTION_DEAL:
+            preflop = True
+            current_bet = max(current_bet, record.big_blind)
+            for i in range(seated):
+                if active[i]:
+                    deltas[i]["hands_dealt"] = 1
+        elif action == ACTION_BLIND:
+            round_bet[seat] += amount
+        elif action in (ACTION_CALL, ACTION_RAISE, ACTION_ALLIN):
+            round_bet[seat] += amount
+            raised = round_bet[seat] > current_bet
+            if raised:
+                current_bet = round_bet[seat]
+            if preflop:
+                delta["vpip_hands"] = 1
+                if action == ACTION_RAISE or (action == ACTION_ALLIN and raised):
+                    delta["pfr_hands"] = 1
+        elif action == ACTION_FOLD:
+            active[seat] = False
+        elif action == ACTION_STREET:
+            preflop = False
+        elif action == ACTION_SHOWDOWN:
+            showdown = True
+            for i, is_active in enumerate(active):
+                if is_active:
+                    deltas[i]["showdowns"] = 1
+        elif action == ACTION_WIN:
+            if showdown:
+                delta["showdowns_won"] = 1
+            delta["biggest_pot"] = max(delta["biggest_pot"], amount)
+    for delta, net in zip(deltas, record.net_chips()):
+        delta["net_chips"] = net
+    return {seat[0]: delta for seat, delta in zip(seats, deltas)}
+
+
+def merge_stats(total: dict, deltas: dict):
+    """把增量合并进总表（原地修改），昵称以最新一局为准"""
+    for pid, delta in deltas.items():
+        stats = total.get(pid)
+        if stats is None:
+            total[pid] = dict(delta)
+            continue
+        stats["name"] = delta["name"]
+        for key in COUNTERS:
+            stats[key] += delta[key]
+        if delta["biggest_pot"] > stats["biggest_pot"]:
+            stats["biggest_pot"] = delta["biggest_pot"]
+
+
+def summarize(stats: dict) -> dict:
+    """由计数计算展示用的比率"""
+    hands = stats["hands_dealt"]
+    showdowns = stats["showdowns"]
+    return {
+        "vpip": stats["vpip_hands"] / hands if hands else 0.0,
+        "pfr": stats["pfr_hands"] / hands if hands else 0.0,
+        "showdown_win_rate": stats["showdowns_won"] / showdowns if showdowns else 0.0,
+    }
+
+
+# -------------------------
+# 统计检查点
+# -------------------------
+# 统计文件格式：{"position": [段序号, 偏移], "players": {player_id: stats}}，
+# position 为已统计到的归档位置。
+
+
+def write_checkpoint(path: str, players: dict, position: tuple):
+    """写入统计检查点：先写临时文件再替换，读取方不会看到写了一半的文件"""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"position": list(position) if position else None, "players": players},
+                  f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _file_signature(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class StatsStore(JsonStore):
+    """
+    玩家统计存储：内存中的统计随每局增量更新，文件只按间隔写入检查点。
+    检查点记录已统计到的归档位置，加载时从该位置起重放归档补齐，
+    因此每局不必重写整个文件，崩溃或文件被离线重建替换后也不会丢失或重复统计。
+    """
+
+    def __init__(self, path: str, archive: HandArchive, flush_seconds: float = 60):
+        super().__init__(path, "玩家统计")
+        self.archive = archive
+        self.flush_seconds = flush_seconds  # 两次写入检查点的最短间隔
+        self.position = None                # 已统计到的归档位置 (段序号, 偏移)
+        self.dirty = False
+        self._names = None                  # 昵称 -> 玩家 id，首次查询时构建
+        self._signature = None              # 上次读写后的文件签名，用于发现被离线重建替换
+        self._saved_at = time.monotonic()
+
+    def _load(self) -> dict:
+        started = time.perf_counter()
+        checkpoint = super()._load()
+        self._signature = _file_signature(self.path)
+        players = checkpoint.get("players", {})
+        position = tuple(checkpoint["position"]) if checkpoint.get("position") else None
+        for raw, position in self.archive.iter_from(position):
+            merge_stats(players, hand_stats(decode_hand(raw)))
+            self.dirty = True
+        self.position = position
+        self._names = None
+        self.load_seconds = time.perf_counter() - started
+        return players
+
+    @property
+    def names(self) -> dict:
+        if self._names is None:
+            self._names = {s["name"]: pid for pid, s in self.data.items()}
+        return self._names
+
+    def update(self, data: bytes, position: tuple):
+        """用刚归档的一局（结束于 position）增量更新统计；加载时已补齐的记录不会重复计入"""
+        players = self.data
+        if self.position is not None and position <= self.position:
+            return
+        deltas = hand_stats(decode_hand(data))
+        merge_stats(players, deltas)
+        if self._names is not None:
+            for pid, delta in deltas.items():
+                self._names[delta["name"]] = pid
+        self.position = position
+        self.dirty = True
+        self.flush()
+
+    def flush(self, force: bool = False):
+        """距上次写入超过 flush_seconds 时写入检查点；force 时只要有修改就写入"""
+        if not self.dirty:
+            return
+        if not force and time.monotonic() - self._saved_at < self.flush_seconds:
+            return
+        if _file_signature(self.path) != self._signature:
+            # 文件已被离线重建替换：以新文件为准，从它的检查点补齐之后的对局，而不是用内存中的旧统计覆盖它
+            with self._lock:
+                self._data = self._load()
+        self.save()
+
+    def save(self):
+        try:
+            write_checkpoint(self.path, self.data, self.position)
+            self._signature = _file_signature(self.path)
+            self.dirty = False
+        except Exception as e:
+            print(f"保存{self.label}失败:", e)
+        self._saved_at = time.monotonic()
+
+
+# -------------------------
+# 从归档重建统计
+# -------------------------
+def _segment_stats(path: str) -> tuple:
+    """进程池任务：流式统计一个归档段，同时返回统计到的段内偏移"""
+    total = {}
+    offset = 0
+    for raw, offset in iter_frames(path):
+        merge_stats(total, hand_stats(decode_hand(raw)))
+    return total, offset
+
+
+def rebuild_stats(archive_dir: str, processes: int = None) -> tuple:
+    """
+    单遍扫描整个归档重建统计，返回 (统计, 已统计到的归档位置)。每个归档段由进程池中的一个进程流式处理，
+    内存占用只与单个段大小和玩家数量有关，与历史局数无关。
+    """
+    from concurrent.futures import ProcessPoolExecutor  # 仅重建工具使用，不拖慢插件加载
+    segments = HandArchive(archive_dir).segments()
+    total = {}
+    position = None
+    if not segments:
+        return total, position
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        # 按段顺序合并，保证昵称取最新值
+        for path, (partial, offset) in zip(segments, pool.map(_segment_stats, segments)):
+            merge_stats(total, partial)
+            position = (segment_index(path), offset)
+    return total, position
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="从手牌历史归档重建玩家统计")
+    base = os.path.dirname(__file__)
+    parser.add_argument("--archive", default=os.path.join(base, "hand_records"), help="手牌历史归档目录")
+    parser.add_argument("--output", default=os.path.join(base, "player_stats.json"), help="输出的统计文件")
+    parser.add_argument("--processes", type=int, default=None, help="进程数，默认使用全部 CPU")
+    args = parser.parse_args()
+    total, position = rebuild_stats(args.archive, args.processes)
+    # 插件运行中也可以重建：插件下次写入检查点前会发现文件已被替换，改为加载此文件并补齐之后的对局
+    write_checkpoint(args.output, total, position)
+    print(f"已重建 {len(total)} 名玩家的统计 -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import itertools
+
+from .deck import CARDS, Deck, ReplayShuffler
+
+MAX_SEATS = 16  # 手牌历史用 4 位记录座位号；16 人也不会发完一副牌
+
+# 手牌历史中的动作类型（高 4 位为动作，低 4 位为座位号）
+ACTION_JOIN = 0       # 加入并支付买入
+ACTION_BLIND = 1      # 支付盲注
+ACTION_CALL = 2       # 跟注
+ACTION_RAISE = 3      # 加注（记录总支付额）
+ACTION_ALLIN = 4      # 全压
+ACTION_CHECK = 5      # 看牌
+ACTION_FOLD = 6       # 弃牌
+ACTION_DEAL = 7       # 发手牌
+ACTION_STREET = 8     # 发翻牌/转牌/河牌
+ACTION_SHOWDOWN = 9   # 摊牌
+ACTION_WIN = 10       # 赢得彩池（记录分得金额）
+
+class PokerGame:
+    def __init__(self, buyin: int, small_blind: int, big_blind: int, bet_amount: int, max_players: int, shuffler=None,
+                 players: list = None, seed: int = None):
+        self.buyin = buyin                  # 加入游戏时支付的买入金额
+        self.small_blind = small_blind      # 小盲注金额
+        self.big_blind = big_blind          # 大盲注金额
+        self.bet_amount = bet_amount        # 后续每轮固定跟注金额
+        self.max_players = min(max_players, MAX_SEATS)  # 最大玩家数
+        self.players = players if players is not None else []  # 玩家记录：{"id": str, "name": str, "cards": list, ...}
+        self.seed = None                    # 本局洗牌种子
+        self.deck = Deck(shuffler)          # 本桌复用的牌堆缓冲区
+        self.dealt = []                     # 本局已发出的牌（单字节编码，按发牌顺序）
+        self.actions = []                   # 本局动作流：[(动作, 座位, 金额), ...]
+        self.start_active = []              # 本局开始时已入座玩家的活跃状态
+        self.odds = None                    # 本局胜率提示的模拟样本（odds.StreetOdds），翻牌时创建
+        self.odds_task = None               # 本局最近一条街的胜率提示任务
+        self.community_cards = []           # 公共牌
+        self.phase = "waiting"              # 游戏阶段：waiting, preflop, flop, turn, river, showdown
+        self.pot = 0                        # 当前彩池
+        self.current_bet = 0                # 当前轮要求的投注额度
+        self.current_turn_index = 0         # 当前行动玩家索引
+        self.last_raiser_index = -1         # 最后加注的玩家索引
+        self.all_checked = False            # 是否所有玩家都过牌
+        self.finished = False               # 本局是否已结束（摊牌后等待继续）
+        self.begin_hand(seed)
+
+    @classmethod
+    def for_replay(cls, buyin: int, small_blind: int, big_blind: int, bet_amount: int, max_players: int,
+                   players: list, shuffler_id: int, seed: int, dealt: bytes):
+        """回放用的牌桌：与新牌桌走同一个构造流程，只是按记录的发牌顺序装入牌堆，不重新洗牌"""
+        game = cls(buyin, small_blind, big_blind, bet_amount, max_players, ReplayShuffler(shuffler_id), players, seed)
+        game.deck.load(dealt)
+        return game
+
+    def deal_card(self):
+        code = self.deck.deal()
+        self.dealt.append(code)
+        return CARDS[code]
+
+    def begin_hand(self, seed: int = None):
+        """开始新一局：重新洗牌（不传种子时由洗牌器生成），清空动作流并快照当前座位"""
+        self.seed = self.deck.shuffle(seed)
+        self.dealt = []
+        self.actions = []
+        self.start_active = [p["active"] for p in self.players]
+        self.odds = None
+        self.odds_task = None
+
+    def record(self, action: int, player: dict = None, amount: int = 0):
+        """向本局动作流追加一条记录"""
+        seat = 0
+        if player is not None:
+            for i, p in enumerate(self.players):
+                if p is player:
+                    seat = i
+                    break
+        self.actions.append((action, seat, amount))
+
+    def advance_turn(self):
+        """轮转到下一个活跃玩家"""
+        n = len(self.players)
+        if n == 0:
+            return
+        # 从当前行动玩家之后开始查找
+        for i in range(1, n+1):
+            index = (self.current_turn_index + i) % n
+            if self.players[index]["active"]:
+                self.current_turn_index = index
+                return
+
+    def reset_round_bets(self):
+        """重置所有玩家的本轮下注"""
+        for player in self.players:
+            player["round_bet"] = 0
+
+    def all_players_checked(self):
+        """检查是否所有玩家都过牌"""
+        for player in self.players:
+            if player["active"] and player["round_bet"] < self.current_bet:
+                return False
+        return True
+
+# -------------------------
+# 牌型评价函数
+# -------------------------
+def evaluate_5cards(cards: list) -> tuple:
+    """
+    对 5 张牌进行评价，返回一个元组表示手牌强度。
+    数值越大表示手牌越好，元组中第一个元素为类别，其它元素为高牌信息。
+    类别定义：
+        8: 同花顺
+        7: 四条
+        6: 葫芦（满堂红）
+        5: 同花
+        4: 顺子
+        3: 三条
+        2: 两对
+        1: 一对
+        0: 高牌
+    """
+    rank_map = {"2":2, "3":3, "4":4, "5":5, "6":6, "7":7, "8":8, "9":9, "10":10, "J":11, "Q":12, "K":13, "A":14}
+    values = []
+    suits = []
+    for card in cards:
+        rank = card[:-1]
+        suit = card[-1]
+        values.append(rank_map[rank])
+        suits.append(suit)
+    values.sort(reverse=True)
+    freq = {}
+    for v in values:
+        freq[v] = freq.get(v, 0) + 1
+    counts = sorted(freq.values(), reverse=True)
+    flush = len(set(suits)) == 1
+    straight = False
+    high_straight = None
+    unique_vals = sorted(set(values))
+    if len(unique_vals) >= 5:
+        for i in range(len(unique_vals)-4):
+            seq = unique_vals[i:i+5]
+            if seq == list(range(seq[0], seq[0]+5)):
+                straight = True
+                high_straight = seq[-1]
+        if set([14,2,3,4,5]).issubset(set(values)):
+            straight = True
+            high_straight = 5
+    if flush and straight:
+        return (8, high_straight, values)
+    elif counts[0] == 4:
+        four_val = max(v for v, c in freq.items() if c == 4)
+        kicker = max(v for v in values if v != four_val)
+        return (7, four_val, kicker)
+    elif counts[0] == 3 and any(c >= 2 for v, c in freq.items() if c >= 2 and v not in [max(v for v, c in freq.items() if c == 3)]):
+        three_val = max(v for v, c in freq.items() if c == 3)
+        pair_val = max(v for v, c in freq.items() if c >= 2 and v != three_val)
+        return (6, three_val, pair_val)
+    elif flush:
+        return (5, values)
+    elif straight:
+        return (4, high_straight, values)
+    elif counts[0] == 3:
+        three_val = max(v for v, c in freq.items() if c == 3)
+        kickers = sorted([v for v in values if v != three_val], reverse=True)
+        return (3, three_val, kickers)
+    elif counts[0] == 2 and len([v for v, c in freq.items() if c == 2]) >= 2:
+        pairs = sorted([v for v, c in freq.items() if c == 2], reverse=True)
+        kicker = max(v for v in values if v not in pairs)
+        return (2, pairs, kicker)
+    elif counts[0] == 2:
+        pair_val = max(v for v, c in freq.items() if c == 2)
+        kickers = sorted([v for v in values if v != pair_val], reverse=True)
+        return (1, pair_val, kickers)
+    else:
+        return (0, values)
+
+def evaluate_hand(cards: list) -> tuple:
+    """
+    给定 7 张牌（2张手牌+5张公共牌），返回最佳 5 张牌的评价元组。
+    """
+    best = None
+    for combo in itertools.combinations(cards, 5):
+        rank = evaluate_5cards(list(combo))
+        if best is None or rank > best:
+            best = rank
+    return best
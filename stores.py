@@ -0,0 +1,228 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote, unquote
+
+# -------------------------
+# 延迟加载的 JSON 存储
+# -------------------------
+
+
+class JsonStore:
+    """
+    JSON 文件存储：首次访问 data 时才读取文件，也可以用 preload 在后台线程提前加载。
+    后台加载尚未完成时访问会等待同一把锁，不会重复读取。
+    """
+
+    def __init__(self, path: str, label: str):
+        self.path = path
+        self.label = label              # 用于日志的名称，如 "tokens"
+        self.load_seconds = None        # 实际加载耗时，未加载时为 None
+        self._data = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._load()
+        return self._data
+
+    def _load(self) -> dict:
+        started = time.perf_counter()
+        data = {}
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+        except Exception as e:
+            print(f"加载{self.label}失败:", e)
+        self.load_seconds = time.perf_counter() - started
+        return data
+
+    def preload(self):
+        self.data
+
+    def save(self):
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=4)
+        except Exception as e:
+            print(f"保存{self.label}失败:", e)
+
+
+class ShardedStore:
+    """
+    按群分片的 JSON 存储：每个群一个文件，首次访问时加载。
+    常驻内存的分片按 LRU 淘汰（超过容量或长时间未访问），修改后只写回对应分片，
+    因此内存和每次写入的 I/O 只与活跃群数量有关，与历史总人数无关。
+    调用方修改取出的分片后调用 save（或整体赋值）标记修改；只读访问不会写文件。
+    """
+
+    def __init__(self, directory: str, label: str, legacy_path: str = None, legacy_split=None,
+                 capacity: int = 64, idle_seconds: float = 600, is_pinned=None):
+        self.directory = directory
+        self.label = label
+        self.legacy_path = legacy_path      # 旧版单文件，首次使用时拆分为分片
+        self.legacy_split = legacy_split    # legacy_split(旧版数据) -> {key: 分片}；为 None 时旧版文件本身就是 {key: 分片}
+        self.capacity = capacity            # 最多常驻的分片数
+        self.idle_seconds = idle_seconds    # 超过该时长未访问的分片会被淘汰
+        self.is_pinned = is_pinned          # is_pinned(key) 为真的分片（如正在游戏的群）不会被淘汰
+        self.shards = OrderedDict()         # key -> 分片数据，最近访问的在末尾
+        self.last_access = {}
+        self.dirty = set()
+        self.evicted = OrderedDict()        # 刚淘汰的分片（已写回），调用方仍持有引用时 save 照样能写回
+        self.load_seconds = None            # 旧版文件拆分耗时，未拆分时为 None
+        self._migrated = legacy_path is None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, quote(key, safe="") + ".json")
+
+    def __contains__(self, key: str) -> bool:
+        self.migrate_legacy()
+        return key in self.shards or os.path.exists(self._path(key))
+
+    def __getitem__(self, key: str) -> dict:
+        shard = self.shards.get(key)
+        if shard is None:
+            shard = self.evicted.pop(key, None)
+            if shard is None:
+                shard = self._load(key)
+            self.shards[key] = shard
+        else:
+            self.shards.move_to_end(key)
+        self.last_access[key] = time.monotonic()
+        self._evict(keep=key)
+        return shard
+
+    def __setitem__(self, key: str, shard: dict):
+        self.evicted.pop(key, None)
+        self.shards[key] = shard
+        self.shards.move_to_end(key)
+        self.last_access[key] = time.monotonic()
+        self.dirty.add(key)
+        self._evict(keep=key)
+
+    def keys(self) -> list:
+        """所有分片的 key（包括未加载的分片文件）"""
+        self.migrate_legacy()
+        keys = set(self.shards)
+        if os.path.isdir(self.directory):
+            keys.update(unquote(name[:-5]) for name in os.listdir(self.directory) if name.endswith(".json"))
+        return sorted(keys)
+
+    def peek(self, key: str) -> dict:
+        """只读地取出分片：未加载时直接读文件，不放入缓存，也不影响淘汰顺序"""
+        shard = self.shards.get(key)
+        if shard is None:
+            shard = self.evicted.get(key)
+        if shard is None:
+            shard = self._load(key)
+        return shard
+
+    def _load(self, key: str) -> dict:
+        self.migrate_legacy()
+        path = self._path(key)
+        try:
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"加载{self.label}失败:", e)
+        return {}
+
+    def _evict(self, keep: str = None):
+        """淘汰超出容量或闲置的分片；keep（正在访问的分片）和被固定的分片不会被淘汰"""
+        if not self.shards:
+            return
+        now = time.monotonic()
+        oldest = next(iter(self.shards))
+        if len(self.shards) <= self.capacity and now - self.last_access[oldest] <= self.idle_seconds:
+            return
+        for key in list(self.shards):
+            if len(self.shards) <= self.capacity and now - self.last_access[key] <= self.idle_seconds:
+                break
+            if key == keep or (self.is_pinned is not None and self.is_pinned(key)):
+                continue
+            self.flush(key)
+            if key in self.dirty:
+                continue  # 写回失败，留在内存中等下次再写
+            self.evicted[key] = self.shards.pop(key)
+            del self.last_access[key]
+        while len(self.evicted) > self.capacity:
+            self.evicted.popitem(last=False)
+
+    def save(self, key: str):
+        """标记分片已修改并立即写回该分片（即使它刚被淘汰）"""
+        self.dirty.add(key)
+        self.flush(key)
+
+    def flush(self, key: str = None):
+        """写回指定分片，不指定时写回全部已修改的分片"""
+        keys = [key] if key is not None else list(self.dirty)
+        for k in keys:
+            if k not in self.dirty:
+                continue
+            shard = self.shards.get(k)
+            if shard is None:
+                shard = self.evicted.get(k)
+            if shard is None:
+                self.dirty.discard(k)
+                continue
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self._path(k), "w", encoding="utf-8") as f:
+                    json.dump(shard, f, ensure_ascii=False, indent=4)
+                self.dirty.discard(k)
+            except Exception as e:
+                print(f"保存{self.label}失败:", e)
+
+    def migrate_legacy(self):
+        """把旧版单文件拆分为分片文件，只执行一次；已存在的分片文件不会被覆盖"""
+        if self._migrated:
+            return
+        with self._lock:
+            if self._migrated:
+                return
+            started = time.perf_counter()
+            try:
+                if os.path.exists(self.legacy_path):
+                    with open(self.legacy_path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if self.legacy_split is not None:
+                        data = self.legacy_split(data)
+                    os.makedirs(self.directory, exist_ok=True)
+                    for key, shard in data.items():
+                        path = self._path(key)
+                        if not os.path.exists(path):
+                            with open(path, "w", encoding="utf-8") as f:
+                                json.dump(shard, f, ensure_ascii=False, indent=4)
+                    os.replace(self.legacy_path, self.legacy_path + ".migrated")
+            except Exception as e:
+                print(f"迁移{self.label}失败:", e)
+            self.load_seconds = time.perf_counter() - started
+            self._migrated = True
+
+    def preload(self):
+        self.migrate_legacy()
+
+
+def preload_in_background(stores: list, on_done=None) -> threading.Thread:
+    """在后台守护线程中依次加载各存储，全部完成后调用 on_done(stores)"""
+    def run():
+        for store in stores:
+            store.preload()
+        if on_done is not None:
+            on_done(stores)
+
+    thread = threading.Thread(target=run, name="poker-store-preload", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,12 @@
+import os
+import sys
+import types
+
+# 插件以包的形式加载（模块之间使用相对导入），测试时把插件目录注册为 poker_plugin 包。
+# main.py 依赖 AstrBot，测试只导入不依赖它的模块。
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "poker_plugin" not in sys.modules:
+    package = types.ModuleType("poker_plugin")
+    package.__path__ = [PLUGIN_DIR]
+    sys.modules["poker_plugin"] = package
@@ -0,0 +1,51 @@
+import pytest
+
+from poker_plugin.deck import Deck, FastShuffler, SecureShuffler, SHUFFLERS, shuffled_codes
+from poker_plugin.poker_game import PokerGame
+
+
+@pytest.mark.parametrize("shuffler", [FastShuffler, SecureShuffler])
+def test_deck_deals_each_card_once_then_raises(shuffler):
+    deck = Deck(shuffler())
+    for seed in range(200):
+        assert deck.shuffle(seed) == seed
+        dealt = [deck.deal() for _ in range(52)]
+        assert sorted(dealt) == list(range(52))
+        assert deck.remaining() == 0
+        with pytest.raises(RuntimeError):
+            deck.deal()
+
+
+@pytest.mark.parametrize("shuffler", [FastShuffler, SecureShuffler])
+def test_same_seed_same_order(shuffler):
+    deck = Deck(shuffler())
+    seed = deck.shuffle()
+    first = [deck.deal() for _ in range(20)]
+    deck.shuffle(seed)
+    assert [deck.deal() for _ in range(20)] == first
+    assert shuffled_codes(shuffler.id, seed)[:20] == first
+
+
+def test_shuffler_ids_are_stable():
+    # id 写入手牌记录，改动会导致旧记录无法核对
+    assert {cls.id: cls.name for cls in SHUFFLERS.values()} == {0: "fast", 1: "secure"}
+
+
+def test_load_rejects_duplicates():
+    deck = Deck()
+    with pytest.raises(ValueError):
+        deck.load(bytes([1, 2, 1]))
+    deck.load(bytes([5, 7]))
+    assert [deck.deal(), deck.deal()] == [5, 7]
+    with pytest.raises(RuntimeError):
+        deck.deal()
+
+
+def test_game_never_deals_duplicates_across_hands():
+    game = PokerGame(100, 10, 20, 20, 16)
+    for _ in range(50):
+        cards = [game.deal_card() for _ in range(52)]
+        assert len(set(cards)) == 52
+        with pytest.raises(RuntimeError):
+            game.deal_card()
+        game.begin_hand()
@@ -0,0 +1,241 @@
+from poker_plugin.poker_game import (
+    PokerGame, ACTION_JOIN, ACTION_BLIND, ACTION_CALL, ACTION_RAISE, ACTION_CHECK,
+    ACTION_FOLD, ACTION_DEAL, ACTION_STREET, ACTION_SHOWDOWN, ACTION_WIN, evaluate_hand,
+)
+from poker_plugin.deck import SecureShuffler
+from poker_plugin.hand_history import (
+    HandArchive, encode_hand, decode_hand, replay, verify_seed, iter_segment,
+)
+
+
+# 以下辅助函数按插件各指令的处理逻辑操作牌局，并断言该操作在插件中是允许的，
+# 保证测试用的动作流都是插件实际可能产生的。
+
+
+def join(game, pid):
+    assert game.phase == "waiting"
+    game.players.append({"id": pid, "name": f"玩家{pid}", "cards": [], "private_unified": "", "round_bet": 0, "active": True})
+    game.pot += game.buyin
+    game.record(ACTION_JOIN, game.players[-1], game.buyin)
+
+
+def blind(game, player, amount):
+    player["round_bet"] += amount
+    game.pot += amount
+    game.record(ACTION_BLIND, player, amount)
+
+
+def deal(game):
+    """/poker deal：发手牌后由前两个座位支付盲注"""
+    assert game.phase == "waiting" and len(game.players) >= 2
+    game.current_turn_index = 2 if len(game.players) >= 3 else 0
+    game.record(ACTION_DEAL)
+    for player in game.players:
+        player["cards"] = [game.deal_card(), game.deal_card()]
+    blind(game, game.players[0], game.small_blind)
+    blind(game, game.players[1], game.big_blind)
+    game.current_bet = game.big_blind
+    game.phase = "preflop"
+
+
+def acting_player(game):
+    player = game.players[game.current_turn_index]
+    assert player["active"], "轮到的玩家已弃牌"
+    return player
+
+
+def call(game):
+    player = acting_player(game)
+    amount = game.current_bet - player["round_bet"]
+    assert amount > 0, "已经跟满注，插件不允许跟注"
+    player["round_bet"] += amount
+    game.pot += amount
+    game.record(ACTION_CALL, player, amount)
+    game.advance_turn()
+
+
+def raise_bet(game, increment):
+    player = acting_player(game)
+    amount = game.current_bet - player["round_bet"] + increment
+    assert amount <= game.small_blind * 10, "超过加注上限"
+    player["round_bet"] += amount
+    game.pot += amount
+    game.current_bet = player["round_bet"]
+    game.record(ACTION_RAISE, player, amount)
+    game.advance_turn()
+
+
+def check(game):
+    player = acting_player(game)
+    assert player["round_bet"] >= game.current_bet, "未跟满注，插件不允许看牌"
+    game.record(ACTION_CHECK, player)
+    game.advance_turn()
+
+
+def fold(game, player):
+    """/poker fold 不要求轮到自己，也不会轮转行动玩家"""
+    assert player["active"]
+    player["active"] = False
+    player["round_bet"] = 0
+    game.record(ACTION_FOLD, player)
+
+
+def next_street(game):
+    assert all(p["round_bet"] >= game.current_bet for p in game.players if p["active"]), "还有玩家未跟注"
+    game.record(ACTION_STREET)
+    game.deal_card()  # 烧牌
+    if game.phase == "preflop":
+        game.community_cards.extend(game.deal_card() for _ in range(3))
+        game.phase = "flop"
+    else:
+        game.community_cards.append(game.deal_card())
+        game.phase = "turn" if game.phase == "flop" else "river"
+    for player in game.players:
+        if player["active"]:
+            player["round_bet"] = 0
+    game.current_bet = game.bet_amount
+
+
+def finish(game):
+    """/poker showdown：按 evaluate_hand 决出赢家，平局平分彩池"""
+    assert game.phase == "river"
+    assert all(p["round_bet"] >= game.current_bet for p in game.players if p["active"]), "还有玩家未跟注"
+    ranks = {i: evaluate_hand(p["cards"] + game.community_cards) for i, p in enumerate(game.players) if p["active"]}
+    best = max(ranks.values())
+    winners = [game.players[i] for i, rank in ranks.items() if rank == best]
+    game.record(ACTION_SHOWDOWN)
+    for winner in winners:
+        game.record(ACTION_WIN, winner, game.pot // len(winners))
+    game.finished = True
+
+
+def continue_hand(game, seed):
+    """/poker continue：轮转座位，重新洗牌并由新的前两个座位支付盲注（弃牌状态不会重置）"""
+    assert game.finished
+    game.community_cards = []
+    game.phase = "waiting"
+    game.pot = 0
+    game.current_bet = 0
+    for p in game.players:
+        p["round_bet"] = 0
+    game.players = game.players[1:] + game.players[:1]
+    game.begin_hand(seed)
+    blind(game, game.players[0], game.small_blind)
+    blind(game, game.players[1], game.big_blind)
+    game.current_turn_index = 2 if len(game.players) >= 3 else 0
+    game.finished = False
+
+
+def snapshot(game):
+    return (game.pot, game.phase, game.current_bet, game.current_turn_index, game.community_cards, game.finished,
+            [(p["id"], p["cards"], p["round_bet"], p["active"]) for p in game.players])
+
+
+def play_first_hand(shuffler=None, seed=20240601):
+    game = PokerGame(100, 10, 20, 20, 9, shuffler, seed=seed)
+    for pid in ("1001", "1002", "1003", "1004"):
+        join(game, pid)
+    deal(game)                      # 座位 0 小盲 10，座位 1 大盲 20，座位 2 先行动
+    call(game)                      # 座位 2 跟注 20
+    raise_bet(game, 10)             # 座位 3 加注到 30
+    fold(game, game.players[1])     # 座位 1 弃牌（未轮到也可以弃牌）
+    call(game)                      # 座位 0 补 20
+    call(game)                      # 座位 2 补 10
+    next_street(game)               # 翻牌，每人需跟 20
+    for _ in range(3):
+        call(game)
+    next_street(game)               # 转牌
+    raise_bet(game, 10)             # 座位 3 加注到 30
+    call(game)
+    call(game)
+    next_street(game)               # 河牌
+    for _ in range(3):
+        call(game)
+    finish(game)
+    return game
+
+
+def play_continued_hand(game, seed=20240602):
+    continue_hand(game, seed)       # 座位轮转：[1002(已弃牌), 1003, 1004, 1001]
+    deal(game)
+    call(game)                      # 1004 跟注
+    call(game)                      # 1001 跟注，跳过已弃牌的 1002
+    check(game)                     # 1003 已跟满（continue 与 deal 各付一次大盲）
+    next_street(game)
+    raise_bet(game, 20)             # 1004 加注到 40
+    call(game)                      # 1001
+    call(game)                      # 1003
+    next_street(game)
+    fold(game, game.players[3])     # 1001 弃牌
+    call(game)                      # 1004
+    call(game)                      # 1003
+    next_street(game)
+    call(game)
+    call(game)
+    finish(game)
+    return game
+
+
+def test_round_trip_and_replay_across_continued_hand():
+    game = play_first_hand()
+    first = decode_hand(encode_hand(game, "群1", 1700000000))
+    assert snapshot(replay(first)) == snapshot(game)
+
+    game = play_continued_hand(game)
+    data = encode_hand(game, "群1", 1700000100)
+    record = decode_hand(data)
+    assert record.group_id == "群1"
+    assert [seat[0] for seat in record.seats] == [p["id"] for p in game.players]
+    assert record.actions == game.actions
+    assert bytes(game.dealt) == record.dealt
+    assert snapshot(replay(record)) == snapshot(game)
+    # 回放出的牌局可以再次编码，且与原记录逐字节相同
+    assert encode_hand(replay(record), "群1", 1700000100) == data
+    # 中途状态：回放到发手牌之后，公共牌尚未发出
+    partial = replay(record, upto=record.actions.index((ACTION_DEAL, 0, 0)) + 1)
+    assert partial.phase == "preflop"
+    assert partial.community_cards == []
+    assert [p["cards"] for p in partial.players] == [p["cards"] for p in game.players]
+
+
+def test_net_chips_balance_within_a_hand():
+    game = play_continued_hand(play_first_hand())
+    record = decode_hand(encode_hand(game, "群1", 0))
+    net = record.net_chips()
+    # 平分彩池时整除的余数不发给任何人
+    won = sum(amount for action, _, amount in record.actions if action == ACTION_WIN)
+    assert sum(net) == won - game.pot
+    assert game.pot - won < len(record.seats)
+
+
+def test_verify_seed_and_tampered_deal():
+    for shuffler in (None, SecureShuffler()):
+        record = decode_hand(encode_hand(play_first_hand(shuffler), "群1", 0))
+        assert record.version == 1
+        assert verify_seed(record)
+        record.dealt = bytes(reversed(record.dealt))
+        assert not verify_seed(record)
+
+
+def test_archive_recovers_from_torn_tail(tmp_path):
+    archive = HandArchive(str(tmp_path), segment_size=200)
+    for i in range(4):
+        archive.append(bytes([i]) * 30)
+    last = archive.segments()[-1]
+    with open(last, "ab") as f:
+        f.write(b"\x1e\x01\x02")  # 崩溃留下的半条记录：长度 30，只写了 2 字节
+    reopened = HandArchive(str(tmp_path), segment_size=200)
+    for i in range(4, 10):
+        reopened.append(bytes([i]) * 30)
+    assert [bytes(raw)[0] for raw in reopened] == list(range(10))
+    assert len(reopened.segments()) > 1
+
+
+def test_archive_positions(tmp_path):
+    archive = HandArchive(str(tmp_path), segment_size=100)
+    positions = [archive.append(bytes([i]) * 40) for i in range(5)]
+    assert positions == sorted(positions)
+    assert archive.end_position() == positions[-1]
+    after = [(bytes(raw)[0], pos) for raw, pos in archive.iter_from(positions[1])]
+    assert after == [(i, positions[i]) for i in range(2, 5)]
+    assert [bytes(raw) for raw in iter_segment(archive.segments()[0])] == [bytes([0]) * 40, bytes([1]) * 40]
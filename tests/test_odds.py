@@ -0,0 +1,92 @@
+import itertools
+import random
+
+from poker_plugin.deck import CARDS
+from poker_plugin.odds import SampleSet, StreetOdds, rank_cards, improving_cards
+from poker_plugin.poker_game import evaluate_hand
+
+
+def codes(*cards):
+    return [CARDS.index(card) for card in cards]
+
+
+def test_rank_cards_orders_hands_like_evaluate_hand():
+    rng = random.Random(2024)
+    for _ in range(3000):
+        cards = rng.sample(range(52), 9)
+        board = cards[4:]
+        a = cards[:2] + board
+        b = cards[2:4] + board
+        slow_a = evaluate_hand([CARDS[c] for c in a])
+        slow_b = evaluate_hand([CARDS[c] for c in b])
+        assert (rank_cards(a) > rank_cards(b)) == (slow_a > slow_b), [CARDS[c] for c in cards]
+        assert (rank_cards(a) == rank_cards(b)) == (slow_a == slow_b), [CARDS[c] for c in cards]
+
+
+def test_rank_cards_categories():
+    def rank(cards):
+        return rank_cards(codes(*cards)) >> 20
+
+    assert rank(["A♠", "2♠", "3♠", "4♠", "5♠", "K♥", "K♦"]) == 8
+    assert rank(["9♣", "9♦", "9♥", "9♠", "2♦"]) == 7
+    assert rank(["3♣", "3♦", "3♥", "2♠", "2♦", "2♥"]) == 6
+    assert rank(["A♦", "2♥", "3♣", "4♠", "5♦", "K♠"]) == 4
+    assert rank(["A♦", "K♥", "Q♣", "J♠", "9♦"]) == 0
+
+
+def test_hints_ignore_opponents_hole_cards():
+    board = codes("Q♠", "J♠", "3♥")
+    mine = codes("A♠", "K♠")
+    remaining = [c for c in range(52) if c not in board + mine]
+    seen = set()
+    for opponent in itertools.islice(itertools.combinations(remaining, 2), 0, 200, 37):
+        hints = StreetOdds(50, random.Random(7)).hints({"me": mine, "other": list(opponent)}, board)
+        # 同一随机种子下，胜率和 outs 只取决于自己的手牌和公共牌，与对手的真实手牌无关
+        seen.add((hints["me"][0], tuple(hints["me"][1])))
+    assert len(seen) == 1
+    assert list(seen.pop()[1]) == improving_cards(mine, board)
+
+
+def test_samples_follow_the_board_across_streets():
+    holes = {"a": codes("A♠", "K♠"), "b": codes("7♦", "7♣"), "c": codes("2♥", "9♣")}
+    board = codes("Q♠", "J♠", "3♥", "8♦", "10♠")
+    odds = StreetOdds(300, random.Random(1))
+    assert set(odds.hints(holes, board[:3])) == {"a", "b", "c"}
+    del holes["c"]                           # c 在转牌前弃牌
+    odds.hints(holes, board[:4])
+    hints = odds.hints(holes, board)
+    assert set(odds.players) == {"a", "b"}
+    for key, hole in holes.items():
+        sample_set = odds.players[key]
+        assert sample_set.board == board
+        assert len(sample_set.samples) == 300
+        for cards in sample_set.samples:
+            # 河牌之后只剩一名对手的手牌，且从不包含自己的手牌或已发出的公共牌
+            assert len(cards) == 2 and len(set(cards)) == 2
+            assert not set(cards) & set(hole + board)
+        equity, outs = hints[key]
+        assert 0.0 <= equity <= 1.0 and outs == []
+
+
+def test_advanced_samples_match_fresh_samples():
+    hole = codes("A♠", "K♠")
+    flop = codes("Q♠", "J♠", "3♥")
+    turn = CARDS.index("2♦")
+    advanced = SampleSet(hole, flop, 2, 4000, random.Random(3))
+    advanced.advance(turn, 2)
+    fresh = SampleSet(hole, flop + [turn], 2, 4000, random.Random(4))
+    # 改写后的样本与在转牌后重新抽取的样本服从同一分布
+    assert abs(advanced.equity() - fresh.equity()) < 0.03
+    first = [cards[0] for cards in advanced.samples]
+    assert turn not in first
+    assert max(first.count(c) for c in set(first)) < 4000 / 46 * 1.5
+
+
+def test_players_over_budget_are_skipped_without_breaking_later_streets():
+    holes = {"a": codes("A♠", "K♠"), "b": codes("7♦", "7♣")}
+    board = codes("Q♠", "J♠", "3♥", "8♦")
+    odds = StreetOdds(200, random.Random(5))
+    assert odds.hints(holes, board[:3], budget=0) == {}
+    hints = odds.hints(holes, board)
+    assert set(hints) == {"a", "b"}
+    assert all(sample_set.board == board for sample_set in odds.players.values())
@@ -0,0 +1,148 @@
+import json
+import os
+
+from poker_plugin.poker_game import (
+    ACTION_JOIN, ACTION_BLIND, ACTION_CALL, ACTION_RAISE, ACTION_CHECK, ACTION_FOLD,
+    ACTION_DEAL, ACTION_STREET, ACTION_SHOWDOWN, ACTION_WIN,
+)
+from poker_plugin.hand_history import HandArchive, HandRecord, encode_hand
+from poker_plugin.player_stats import (
+    StatsStore, hand_stats, merge_stats, summarize, rebuild_stats, write_checkpoint,
+)
+
+from test_hand_history import play_first_hand, play_continued_hand
+
+
+def record(seats, start_seats, actions):
+    return HandRecord(1, 0, 0, 0, "群1", 100, 10, 20, 20, seats, start_seats, b"", actions)
+
+
+# 三人入座：A 翻牌前加注，B 大盲后弃牌，C 跟注到底并在摊牌中获胜
+FIRST_HAND = record([("a", "A", True), ("b", "B", True), ("c", "C", True)], 0, [
+    (ACTION_JOIN, 0, 100), (ACTION_JOIN, 1, 100), (ACTION_JOIN, 2, 100),
+    (ACTION_DEAL, 0, 0),
+    (ACTION_BLIND, 0, 10), (ACTION_BLIND, 1, 20),
+    (ACTION_CALL, 2, 20),
+    (ACTION_RAISE, 0, 30),
+    (ACTION_FOLD, 1, 0),
+    (ACTION_CALL, 2, 20),
+    (ACTION_STREET, 0, 0), (ACTION_CALL, 0, 20), (ACTION_CALL, 2, 20),
+    (ACTION_STREET, 0, 0), (ACTION_STREET, 0, 0),
+    (ACTION_SHOWDOWN, 0, 0),
+    (ACTION_WIN, 2, 440),
+])
+
+# 下一局：A 直接弃牌，B 补齐小盲后弃牌，C 未摊牌赢下彩池
+SECOND_HAND = record([("a", "A", True), ("b", "B", True), ("c", "C", True)], 3, [
+    (ACTION_DEAL, 0, 0),
+    (ACTION_BLIND, 1, 10), (ACTION_BLIND, 2, 20),
+    (ACTION_FOLD, 0, 0),
+    (ACTION_CALL, 1, 10),
+    (ACTION_CHECK, 2, 0),
+    (ACTION_STREET, 0, 0),
+    (ACTION_FOLD, 1, 0),
+    (ACTION_WIN, 2, 40),
+])
+
+
+def counters(stats):
+    return {pid: (s["hands_dealt"], s["vpip_hands"], s["pfr_hands"], s["showdowns"], s["showdowns_won"],
+                  s["net_chips"], s["biggest_pot"]) for pid, s in stats.items()}
+
+
+def test_hand_stats_of_hand_written_record():
+    assert counters(hand_stats(FIRST_HAND)) == {
+        "a": (1, 1, 1, 1, 0, -160, 0),
+        "b": (1, 0, 0, 0, 0, -120, 0),
+        "c": (1, 1, 0, 1, 1, 280, 440),
+    }
+    total = {}
+    merge_stats(total, hand_stats(FIRST_HAND))
+    merge_stats(total, hand_stats(SECOND_HAND))
+    assert counters(total) == {
+        "a": (2, 1, 1, 1, 0, -160, 0),
+        "b": (2, 1, 0, 0, 0, -140, 0),
+        "c": (2, 1, 0, 1, 1, 300, 440),
+    }
+    assert summarize(total["a"]) == {"vpip": 0.5, "pfr": 0.5, "showdown_win_rate": 0.0}
+    assert summarize(total["c"]) == {"vpip": 0.5, "pfr": 0.0, "showdown_win_rate": 1.0}
+
+
+def recorded_hands(n):
+    hands = []
+    for i in range(n):
+        game = play_first_hand()
+        hands.append(encode_hand(game, "群1", i))
+        hands.append(encode_hand(play_continued_hand(game), "群1", i))
+    return hands
+
+
+def fixture_counters(n):
+    """n 组测试牌局（首局 + 继续的一局）中与发牌无关的计数：(发牌局数, 入池局数, 加注局数, 摊牌局数)"""
+    return {
+        "1001": (2 * n, 2 * n, 0, n),      # 继续的一局在转牌弃牌
+        "1002": (n, 0, 0, 0),       # 首局弃牌，继续的一局开局即为弃牌状态
+        "1003": (2 * n, n, 0, 2 * n),
+        "1004": (2 * n, 2 * n, n, 2 * n),
+    }
+
+
+def test_rebuild_stats_across_segments(tmp_path):
+    archive = HandArchive(str(tmp_path / "hand_records"), segment_size=600)
+    for data in recorded_hands(6):
+        archive.append(data)
+    assert len(archive.segments()) > 2
+    total, position = rebuild_stats(str(tmp_path / "hand_records"), processes=2)
+    assert position == archive.end_position()
+    assert {pid: c[:4] for pid, c in counters(total).items()} == fixture_counters(6)
+    # 并行重建与逐局增量统计的结果一致
+    assert total == StatsStore(str(tmp_path / "player_stats.json"), archive).data
+
+
+def test_stats_checkpoint_catches_up_from_archive(tmp_path):
+    archive = HandArchive(str(tmp_path / "hand_records"))
+    path = str(tmp_path / "player_stats.json")
+    hands = recorded_hands(5)
+    store = StatsStore(path, archive, flush_seconds=3600)
+    for data in hands[:4]:
+        store.update(data, archive.append(data))
+    assert not os.path.exists(path)         # 间隔内不写文件
+    store.flush(force=True)
+    for data in hands[4:]:
+        store.update(data, archive.append(data))
+    # 模拟崩溃：最后一次检查点之后的对局从归档补齐
+    reloaded = StatsStore(path, archive).data
+    assert {pid: c[:4] for pid, c in counters(reloaded).items()} == fixture_counters(5)
+    assert reloaded == store.data
+
+
+def test_stats_not_counted_twice_after_catch_up(tmp_path):
+    archive = HandArchive(str(tmp_path / "hand_records"))
+    path = str(tmp_path / "player_stats.json")
+    hands = recorded_hands(2)
+    position = None
+    for data in hands:
+        position = archive.append(data)
+    store = StatsStore(path, archive)
+    store.preload()                         # 后台加载时已读到最后一局
+    store.update(hands[-1], position)
+    assert {pid: c[:4] for pid, c in counters(store.data).items()} == fixture_counters(2)
+
+
+def test_external_rebuild_is_not_overwritten(tmp_path):
+    archive = HandArchive(str(tmp_path / "hand_records"))
+    path = str(tmp_path / "player_stats.json")
+    hands = recorded_hands(2)
+    store = StatsStore(path, archive, flush_seconds=0)
+    for data in hands[:3]:
+        store.update(data, archive.append(data))
+    # 离线重建写入的检查点（此处只重建了前 2 局，计数清零以便识别）
+    rebuilt_position = list(archive.iter_from())[1][1]
+    write_checkpoint(path, {}, rebuilt_position)
+    for data in hands[3:]:
+        store.update(data, archive.append(data))
+    # 以重建结果为准，只补齐重建之后的 2 局（继续的一局中 1002 开局即弃牌，不计发牌）
+    expected = {"1001": 2, "1002": 1, "1003": 2, "1004": 2}
+    assert {pid: s["hands_dealt"] for pid, s in store.data.items()} == expected
+    with open(path, encoding="utf-8") as f:
+        assert {pid: s["hands_dealt"] for pid, s in json.load(f)["players"].items()} == expected
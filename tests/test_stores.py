@@ -0,0 +1,81 @@
+import json
+
+from poker_plugin.stores import ShardedStore
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_accessed_shard_is_not_evicted_when_others_are_pinned(tmp_path):
+    store = ShardedStore(str(tmp_path), "tokens", capacity=1, is_pinned=lambda key: key == "A")
+    store["A"]["x"] = 1
+    store.save("A")
+    store["B"]["y"] = 5
+    store.save("B")
+    assert read(tmp_path / "B.json") == {"y": 5}
+    assert not store.dirty
+
+
+def test_save_after_eviction(tmp_path):
+    store = ShardedStore(str(tmp_path), "tokens", capacity=1)
+    held = store["A"]
+    store["B"]              # 淘汰 A
+    held["x"] = 2
+    store.save("A")
+    assert read(tmp_path / "A.json") == {"x": 2}
+    store["C"] = {"z": 3}   # 整体赋值同样视为修改
+    store.flush()
+    assert read(tmp_path / "C.json") == {"z": 3}
+    assert store["A"] == {"x": 2}
+
+
+def test_read_only_access_does_not_write(tmp_path):
+    (tmp_path / "A.json").write_text(json.dumps({"u": 1}), encoding="utf-8")
+    store = ShardedStore(str(tmp_path), "tokens", capacity=1)
+    assert store["A"]["u"] == 1
+    assert store["B"].get("v", 0) == 0
+    store["C"]                  # 淘汰 A、B
+    store.flush()
+    assert not store.dirty
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["A.json"]
+
+
+def test_legacy_file_is_split(tmp_path):
+    legacy = tmp_path / "tokens.json"
+    legacy.write_text(json.dumps({"g1": {"u": 10}, "g2": {"v": 20}}), encoding="utf-8")
+    store = ShardedStore(str(tmp_path / "tokens"), "tokens", legacy_path=str(legacy))
+    assert "g2" in store
+    assert store["g1"] == {"u": 10}
+    assert not legacy.exists()
+    assert store.keys() == ["g1", "g2"]
+
+
+def test_legacy_ranking_is_copied_into_groups(tmp_path):
+    (tmp_path / "tokens.json").write_text(json.dumps({"g1": {"u": 10, "v": 5}, "g2": {"v": 20}}), encoding="utf-8")
+    tokens = ShardedStore(str(tmp_path / "tokens"), "tokens", legacy_path=str(tmp_path / "tokens.json"))
+    legacy = {"u": {"name": "U", "games_played": 3, "wins": 1},
+              "v": {"name": "V", "games_played": 4, "wins": 2},
+              "w": {"name": "W", "games_played": 1, "wins": 0}}
+    (tmp_path / "ranking.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    def split(ranking):
+        # 与插件相同的拆分方式：复制到玩家有余额的各个群，其余玩家放入 _global
+        shards = {}
+        for group_id in tokens.keys():
+            for pid in tokens.peek(group_id):
+                if pid in ranking:
+                    shards.setdefault(group_id, {})[pid] = ranking[pid]
+        placed = {pid for shard in shards.values() for pid in shard}
+        shards["_global"] = {pid: entry for pid, entry in ranking.items() if pid not in placed}
+        return shards
+
+    ranking = ShardedStore(str(tmp_path / "ranking"), "排名", legacy_path=str(tmp_path / "ranking.json"),
+                           legacy_split=split)
+    assert ranking["g1"] == {"u": legacy["u"], "v": legacy["v"]}
+    assert ranking["g2"] == {"v": legacy["v"]}
+    assert ranking["_global"] == {"w": legacy["w"]}
+    assert (tmp_path / "ranking.json.migrated").exists()
+    # peek 不会把余额分片放入缓存
+    assert not tokens.shards